@@ -0,0 +1,161 @@
+import os
+
+import cirq
+import numpy as np
+
+from pauli_frame import WORD_BITS, PauliFrameSimulator, is_noise, is_pauli_channel
+
+# Rough cost model: Python overhead per operation plus time per amplitude touched
+OPERATION_OVERHEAD_S = 20e-6
+AMPLITUDE_UPDATE_S = 5e-9
+COMPLEX64_BYTES = 8
+
+# Backends that return a cirq simulator usable with ``simulator.run``
+CIRQ_BACKENDS = ('state_vector', 'density_matrix', 'trajectory', 'clifford')
+# Backends ``simulator_for`` can instantiate
+SIMULATOR_BACKENDS = CIRQ_BACKENDS + ('pauli_frame',)
+# The analytic backend is computed with ``pauli_transfer`` and has no simulator
+ALL_BACKENDS = SIMULATOR_BACKENDS + ('analytic',)
+
+
+def available_memory_bytes():
+    """
+    Memory available to new allocations, from /proc/meminfo when present.
+    """
+    try:
+        with open('/proc/meminfo') as meminfo:
+            for line in meminfo:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+
+
+def inspect_circuit(circuit, noise=None):
+    """
+    Summarize the properties that decide which simulator fits a circuit.
+    """
+    if noise is not None:
+        circuit = circuit.with_noise(noise)
+    operations = list(circuit.all_operations())
+    noise_ops = [op for op in operations if is_noise(op)]
+    gates = [op for op in operations if not is_noise(op) and not cirq.is_measurement(op)]
+    return {
+        'num_qubits': len(circuit.all_qubits()),
+        'num_operations': len(operations),
+        'num_measured': sum(cirq.num_qubits(op) for op in operations if cirq.is_measurement(op)),
+        'has_noise': bool(noise_ops),
+        'pauli_noise_only': all(is_pauli_channel(op.gate) for op in noise_ops),
+        'clifford': all(cirq.has_stabilizer_effect(op) for op in gates),
+        'terminal_measurements': circuit.are_all_measurements_terminal(),
+        'has_kraus': all(cirq.has_kraus(op) or cirq.is_measurement(op) for op in operations),
+    }
+
+
+def estimate_backends(properties, repetitions):
+    """
+    Estimate memory (bytes) and runtime (seconds) of every applicable backend.
+
+    Returns:
+    - estimates: Mapping of backend name -> {'memory_bytes', 'estimated_seconds'}.
+    """
+    n = properties['num_qubits']
+    ops = properties['num_operations']
+    noisy = properties['has_noise']
+    terminal = properties['terminal_measurements']
+    output_bytes = repetitions * properties['num_measured']
+
+    def dense(amplitudes, passes):
+        # Two state buffers are alive while an operation is applied
+        return {
+            'memory_bytes': 2 * amplitudes * COMPLEX64_BYTES + output_bytes,
+            'estimated_seconds': passes * ops * (OPERATION_OVERHEAD_S + amplitudes * AMPLITUDE_UPDATE_S),
+        }
+
+    estimates = {}
+    if not noisy:
+        estimates['state_vector'] = dense(2.0 ** n, 1 if terminal else repetitions)
+    if properties['has_kraus']:
+        estimates['density_matrix'] = dense(4.0 ** n, 1 if terminal else repetitions)
+    if noisy:
+        estimates['trajectory'] = dense(2.0 ** n, repetitions)
+    if properties['clifford'] and not noisy:
+        estimates['clifford'] = {
+            'memory_bytes': (2 * n) ** 2 + output_bytes,
+            'estimated_seconds': repetitions * ops * (OPERATION_OVERHEAD_S + n * AMPLITUDE_UPDATE_S),
+        }
+    if properties['clifford'] and properties['pauli_noise_only']:
+        words = -(-repetitions // WORD_BITS)
+        estimates['pauli_frame'] = {
+            'memory_bytes': 2 * n * words * 8 + output_bytes,
+            'estimated_seconds': ops * (OPERATION_OVERHEAD_S + words * AMPLITUDE_UPDATE_S),
+        }
+    if n <= 1 and terminal and properties['has_kraus']:
+        estimates['analytic'] = {
+            'memory_bytes': output_bytes,
+            'estimated_seconds': ops * OPERATION_OVERHEAD_S,
+        }
+    return estimates
+
+
+def choose_backend(circuit, repetitions=1000, noise=None, allowed=SIMULATOR_BACKENDS, memory_limit_bytes=None):
+    """
+    Pick the fastest backend whose memory estimate fits, before running anything.
+
+    Parameters:
+    - circuit: The cirq.Circuit to be simulated.
+    - repetitions: Number of shots that will be requested.
+    - noise: Optional noise model that will be applied to the circuit.
+    - allowed: Backend names to consider; the default excludes 'analytic',
+      which ``simulator_for`` cannot instantiate (see ``ALL_BACKENDS``).
+    - memory_limit_bytes: Memory ceiling; defaults to the memory available now.
+
+    Returns:
+    - plan: Dictionary with 'backend', 'memory_bytes', 'estimated_seconds',
+      'properties' and the estimates of every candidate.
+
+    Raises:
+    - MemoryError: If no allowed backend fits in memory.
+    """
+    properties = inspect_circuit(circuit, noise)
+    estimates = {
+        name: estimate for name, estimate in estimate_backends(properties, repetitions).items()
+        if name in allowed
+    }
+    limit = available_memory_bytes() if memory_limit_bytes is None else memory_limit_bytes
+    feasible = {name: e for name, e in estimates.items() if e['memory_bytes'] <= limit}
+    if not feasible:
+        needed = min((e['memory_bytes'] for e in estimates.values()), default=np.inf)
+        raise MemoryError(
+            f"No allowed backend fits: needs at least {needed:.3g} bytes, limit is {limit:.3g} bytes."
+        )
+
+    backend = min(feasible, key=lambda name: feasible[name]['estimated_seconds'])
+    return {
+        'backend': backend,
+        'memory_bytes': feasible[backend]['memory_bytes'],
+        'estimated_seconds': feasible[backend]['estimated_seconds'],
+        'properties': properties,
+        'estimates': estimates,
+    }
+
+
+def simulator_for(plan, noise=None, seed=None):
+    """
+    Instantiate the simulator named by a plan from ``choose_backend``.
+
+    The analytic backend has no simulator object; use ``pauli_transfer`` directly.
+    """
+    backend = plan['backend']
+    if backend == 'state_vector':
+        return cirq.Simulator(noise=noise, seed=seed)
+    if backend == 'density_matrix':
+        return cirq.DensityMatrixSimulator(noise=noise, seed=seed)
+    if backend == 'trajectory':
+        return cirq.Simulator(noise=noise, seed=seed)
+    if backend == 'clifford':
+        return cirq.CliffordSimulator(seed=seed)
+    if backend == 'pauli_frame':
+        return PauliFrameSimulator(seed=seed)
+    raise ValueError(f"Backend '{backend}' has no simulator object.")
@@ -0,0 +1,111 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+from experiment_runner import experiment_grid, run_experiments, run_job
+
+RUN_OPTIONS = ('total_duration', 'num_cycles', 'repetitions')
+
+
+def load_config(path):
+    """
+    Read a JSON config with an ``experiments`` list and optional ``max_workers``
+    and ``plot`` settings. Each experiment takes the ``experiment_grid``
+    arguments (``families``, ``pulse_counts``, ``noise_profiles``, ``seeds``,
+    ``root_seed``), the ``run_job`` options in ``RUN_OPTIONS`` and a ``name``.
+    """
+    with open(path) as handle:
+        config = json.load(handle)
+    if not config.get('experiments'):
+        raise ValueError(f"Config '{path}' lists no experiments.")
+    return config
+
+
+def run_experiment(experiment, max_workers=None):
+    """
+    Run one configured experiment grid.
+
+    Returns:
+    - jobs: Job dictionaries in grid order, without their measurements.
+    - fidelity: Array of shape (jobs, num_cycles) with the |0> probabilities.
+    """
+    jobs = experiment_grid(
+        experiment['families'], experiment['pulse_counts'], experiment['noise_profiles'],
+        seeds=experiment.get('seeds', (0,)), root_seed=experiment.get('root_seed', 0),
+    )
+    options = {key: experiment[key] for key in RUN_OPTIONS if key in experiment}
+    if max_workers == 1:
+        results = [run_job(job, **options) for job in jobs]
+    else:
+        results = list(run_experiments(jobs, max_workers=max_workers, **options))
+    results.sort(key=lambda result: result['index'])
+
+    fidelity = np.array([result['measurements'] for result in results])
+    jobs = [{key: value for key, value in result.items() if key != 'measurements'} for result in results]
+    return jobs, fidelity
+
+
+def save_arrays(output_dir, name, jobs, fidelity):
+    """
+    Write ``<name>_fidelity.npy`` (one row per job) and ``<name>_jobs.json``.
+    """
+    np.save(os.path.join(output_dir, f'{name}_fidelity.npy'), fidelity)
+    with open(os.path.join(output_dir, f'{name}_jobs.json'), 'w') as handle:
+        json.dump(jobs, handle, indent=2)
+
+
+def save_figure(output_dir, name, jobs, fidelity):
+    """
+    Plot every job's fidelity curve to ``<name>.png`` without a display.
+    """
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+
+    figure, axes = plt.subplots(figsize=(10, 6))
+    for job, curve in zip(jobs, fidelity):
+        axes.plot(curve, label=f"{job['family']} n={job['num_pulses']} #{job['index']}")
+    axes.set_xlabel('Measurement Cycle')
+    axes.set_ylabel('Probability of |0⟩')
+    axes.set_title(name)
+    if len(jobs) <= 20:
+        axes.legend(fontsize='small')
+    path = os.path.join(output_dir, f'{name}.png')
+    figure.savefig(path)
+    plt.close(figure)
+    return path
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run decoupling experiments from a config file without a display.')
+    parser.add_argument('config', help='JSON config describing experiments and noise profiles.')
+    parser.add_argument('--output-dir', default='results', help='Directory for arrays and figures.')
+    parser.add_argument('--max-workers', type=int, help='Worker processes (1 runs in-process).')
+    plot = parser.add_mutually_exclusive_group()
+    plot.add_argument('--plot', dest='plot', action='store_true', default=None, help='Write figures.')
+    plot.add_argument('--no-plot', dest='plot', action='store_false', help='Skip figures.')
+    args = parser.parse_args(argv)
+
+    config = load_config(args.config)
+    max_workers = args.max_workers if args.max_workers is not None else config.get('max_workers')
+    make_plots = args.plot if args.plot is not None else config.get('plot', False)
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    for index, experiment in enumerate(config['experiments']):
+        name = experiment.get('name', f'experiment_{index}')
+        start = time.perf_counter()
+        jobs, fidelity = run_experiment(experiment, max_workers)
+        save_arrays(args.output_dir, name, jobs, fidelity)
+        if make_plots:
+            save_figure(args.output_dir, name, jobs, fidelity)
+        print(f"{name}: {len(jobs)} jobs in {time.perf_counter() - start:.1f} s, "
+              f"mean fidelity {fidelity.mean():.4f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,31 +1,61 @@
+import functools
+import logging
+
 import cirq
 import numpy as np
+from scipy import optimize, stats
+
+from backend_selection import CIRQ_BACKENDS, choose_backend, simulator_for
+from circuit_optimization import simplify_circuit
+from pauli_transfer import ZERO_STATE, gate_ptm, noise_profile_ptm, sample_probabilities
+from result_cache import cached_run
+from tracing import POSTPROCESS, SIMULATE, measurement_bytes, span, traced
+
+logger = logging.getLogger(__name__)
 
-def advanced_randomized_benchmarking(circuit, simulator, target_state='0', repetitions=1000):
+def advanced_randomized_benchmarking(circuit, simulator=None, target_state='0', repetitions=1000, optimize=False,
+                                     cache=None, seed=None):
     """
     Performs advanced randomized benchmarking to assess the effectiveness of decoupling sequences.
 
     Parameters:
     - circuit: The quantum circuit to benchmark.
-    - simulator: The quantum simulator to run the circuit.
+    - simulator: The quantum simulator to run the circuit. If None, one is
+      picked with ``backend_selection.choose_backend``.
     - repetitions: The number of repetitions for benchmarking.
+    - optimize: Whether to simplify the circuit with ``simplify_circuit`` first;
+      the removal counts are logged at INFO level on this module's logger.
+    - cache: Optional ``ResultCache`` for the measurement results; only
+      used together with ``seed``.
+    - seed: Optional seed for reproducible samples (see ``result_cache.cached_run``).
 
     Returns:
     - fidelity: The calculated fidelity of the sequence.
     """
+    if optimize:
+        circuit, report = simplify_circuit(circuit)
+        logger.info("Simplified circuit: removed %d operations, %d moments",
+                    report['operations_removed'], report['moments_removed'])
+
     # Ensure measurement gate is present
     if not any(isinstance(op.gate, cirq.MeasurementGate) for op in circuit.all_operations()):
         qubits = list(circuit.all_qubits())  # Convert frozenset to list
         if len(qubits) > 0:
             circuit.append(cirq.measure(qubits[0], key='result'))  # Measure the first qubit
 
+    if simulator is None:
+        simulator = simulator_for(choose_backend(circuit, repetitions, allowed=CIRQ_BACKENDS))
+
     # Run the circuit and collect results
-    results = simulator.run(circuit, repetitions=repetitions)
+    with span('simulator.run', SIMULATE, repetitions=repetitions, circuit=circuit) as current:
+        results = cached_run(simulator, circuit, repetitions, cache=cache, seed=seed)
+        current.set(measurement_bytes=lambda: measurement_bytes(results.measurements))
 
     # Calculate fidelity based on results
     fidelity = calculate_fidelity_from_results(results, target_state=target_state)
     return fidelity
 
+@traced(POSTPROCESS)
 def calculate_fidelity_from_results(results, target_state=0):
     """
     Calculate the fidelity from measurement results.
@@ -46,3 +76,236 @@ def calculate_fidelity_from_results(results, target_state=0):
     fidelity = num_target / total if total > 0 else 0
     
     return fidelity
+
+@functools.lru_cache(maxsize=None)
+def clifford_tables():
+    """
+    Build the single-qubit Clifford group and its lookup tables.
+
+    The 24 elements are generated from H and S by breadth-first search. Their
+    Pauli transfer matrices are signed permutations, which makes them exact,
+    phase-free keys for the multiplication table.
+
+    Returns:
+    - words: Tuple of gate sequences (applied left to right) for each element.
+    - ptms: Array of shape (24, 4, 4) with each element's PTM.
+    - multiply: Table with multiply[a, b] = index of C_a · C_b (C_b applied first).
+    - inverse: Table with inverse[a] = index of C_a^-1.
+    """
+    generators = (cirq.H, cirq.S)
+
+    def key(ptm):
+        return tuple(np.rint(ptm).astype(int).ravel())
+
+    words, ptms, index = [()], [np.eye(4)], {key(np.eye(4)): 0}
+    frontier = [0]
+    while frontier:
+        next_frontier = []
+        for element in frontier:
+            for gate in generators:
+                ptm = gate_ptm(gate) @ ptms[element]
+                if key(ptm) not in index:
+                    index[key(ptm)] = len(words)
+                    words.append(words[element] + (gate,))
+                    ptms.append(ptm)
+                    next_frontier.append(index[key(ptm)])
+        frontier = next_frontier
+
+    ptms = np.rint(np.array(ptms))
+    size = len(words)
+    multiply = np.array([[index[key(ptms[a] @ ptms[b])] for b in range(size)] for a in range(size)])
+    inverse = np.argmax(multiply == 0, axis=1)
+    return tuple(words), ptms, multiply, inverse
+
+
+def random_clifford_sequences(length, num_sequences, rng):
+    """
+    Random Clifford index sequences with their recovery element appended.
+
+    The net Clifford of every sequence is tracked with table lookups only.
+    """
+    _, _, multiply, inverse = clifford_tables()
+    sequences = rng.integers(0, len(inverse), size=(num_sequences, length))
+    net = np.zeros(num_sequences, dtype=int)
+    for column in sequences.T:
+        net = multiply[column, net]
+    return np.concatenate([sequences, inverse[net][:, None]], axis=1)
+
+
+def clifford_sequence_circuit(qubit, sequence):
+    """
+    Build the cirq.Circuit for a sequence of Clifford indices.
+    """
+    words = clifford_tables()[0]
+    return cirq.Circuit(gate(qubit) for index in sequence for gate in words[index])
+
+
+def clifford_randomized_benchmarking(noise, lengths=(1, 2, 4, 8, 16, 32, 64, 128), num_sequences=100,
+                                     repetitions=None, seed=None):
+    """
+    Single-qubit Clifford randomized benchmarking evaluated as one batch.
+
+    Every Clifford is followed by the noise channel. All sequences of a given
+    length are propagated together through precomputed noisy Clifford PTMs,
+    so no Cirq matrices are built per sequence.
+
+    Parameters:
+    - noise: A noise profile dictionary (channels of ``main.apply_realistic_noise``)
+      or any single-qubit cirq channel.
+    - lengths: Sequence lengths (number of random Cliffords before recovery).
+    - num_sequences: Random sequences per length.
+    - repetitions: If given, binomial shot noise with this many shots per sequence.
+    - seed: Seed for sequence generation and shot noise.
+
+    Returns:
+    - result: Dictionary with 'lengths', 'survival' (shape (lengths, sequences)),
+      'mean_survival', 'fit' (A, p, B of A * p^m + B) and 'error_per_clifford'.
+    """
+    rng = np.random.default_rng(seed)
+    noise_ptm = noise_profile_ptm(noise) if isinstance(noise, dict) else gate_ptm(noise)
+    noisy_cliffords = noise_ptm @ clifford_tables()[1]
+
+    survival = np.empty((len(lengths), num_sequences))
+    for row, length in enumerate(lengths):
+        sequences = random_clifford_sequences(length, num_sequences, rng)
+        states = np.tile(ZERO_STATE, (num_sequences, 1))
+        for column in sequences.T:
+            states = np.einsum('sij,sj->si', noisy_cliffords[column], states)
+        survival[row] = 0.5 * (states[:, 0] + states[:, 3])
+
+    if repetitions is not None:
+        survival = sample_probabilities(survival, repetitions, rng)
+
+    mean_survival = survival.mean(axis=1)
+    fit = fit_rb_decay(lengths, mean_survival)
+    return {
+        'lengths': np.asarray(lengths),
+        'survival': survival,
+        'mean_survival': mean_survival,
+        'fit': fit,
+        'error_per_clifford': (1 - fit[1]) / 2,
+    }
+
+
+def fit_rb_decay(lengths, survival):
+    """
+    Fit ``A * p^m + B`` to the mean survival probabilities and return (A, p, B).
+    """
+    def model(m, amplitude, decay, offset):
+        return amplitude * decay ** m + offset
+
+    params, _ = optimize.curve_fit(
+        model, np.asarray(lengths, dtype=float), survival, p0=(0.5, 0.99, 0.5),
+        bounds=([0.0, 0.0, 0.0], [1.0, 1.0, 1.0]),
+    )
+    return tuple(params)
+
+
+def wilson_interval(successes, trials, confidence=0.95):
+    """
+    Wilson score interval for a binomial proportion.
+    """
+    if trials == 0:
+        return 0.0, 1.0
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    p = successes / trials
+    denominator = 1 + z ** 2 / trials
+    center = (p + z ** 2 / (2 * trials)) / denominator
+    half_width = z * np.sqrt(p * (1 - p) / trials + z ** 2 / (4 * trials ** 2)) / denominator
+    return center - half_width, center + half_width
+
+
+def circuit_sampler(circuit, simulator, target_state=0, key='result'):
+    """
+    Return ``sampler(shots)`` that runs the circuit and counts the target outcome.
+    """
+    circuit = circuit.copy()
+    if not any(isinstance(op.gate, cirq.MeasurementGate) for op in circuit.all_operations()):
+        circuit.append(cirq.measure(sorted(circuit.all_qubits())[0], key=key))
+
+    def sampler(shots):
+        results = simulator.run(circuit, repetitions=shots)
+        return int(np.sum(results.measurements[key] == int(target_state)))
+
+    return sampler
+
+
+def adaptive_fidelity_estimate(sampler, target_precision=0.01, initial_shots=100, growth_factor=2.0,
+                               max_shots=100000, confidence=0.95, best_lower_bound=None):
+    """
+    Estimate a fidelity with shots spent in growing batches until it is settled.
+
+    After every batch the Wilson interval is updated. Sampling stops once its
+    half-width is at most ``target_precision``, once the upper bound falls below
+    ``best_lower_bound`` (the candidate is clearly worse than the current best),
+    or when ``max_shots`` is reached.
+
+    Parameters:
+    - sampler: Callable taking a shot count and returning the number of target outcomes.
+    - target_precision: Desired half-width of the confidence interval.
+    - initial_shots: Size of the first batch.
+    - growth_factor: Factor by which each batch grows.
+    - max_shots: Total shot budget for this estimate.
+    - confidence: Confidence level of the interval.
+    - best_lower_bound: Lower bound of the best candidate so far, if any.
+
+    Returns:
+    - estimate: Dictionary with 'fidelity', 'interval', 'shots' and 'stopped'
+      ('precision', 'worse' or 'budget').
+    """
+    if max_shots < 1:
+        raise ValueError(f"max_shots must be at least 1, got {max_shots}.")
+    if int(initial_shots) < 1:
+        raise ValueError(f"initial_shots must be at least 1, got {initial_shots}.")
+    if growth_factor < 1:
+        raise ValueError(f"growth_factor must be at least 1, got {growth_factor}.")
+
+    successes, shots = 0, 0
+    batch = initial_shots
+    while True:
+        batch = min(int(batch), max_shots - shots)
+        successes += sampler(batch)
+        shots += batch
+        low, high = wilson_interval(successes, shots, confidence)
+
+        if (high - low) / 2 <= target_precision:
+            stopped = 'precision'
+        elif best_lower_bound is not None and high < best_lower_bound:
+            stopped = 'worse'
+        elif shots >= max_shots:
+            stopped = 'budget'
+        else:
+            batch *= growth_factor
+            continue
+
+        return {
+            'fidelity': successes / shots,
+            'interval': (low, high),
+            'shots': shots,
+            'stopped': stopped,
+        }
+
+
+def adaptive_candidate_search(samplers, **kwargs):
+    """
+    Compare candidates with adaptive shot allocation, pruning clearly worse ones.
+
+    Parameters:
+    - samplers: Mapping of candidate name -> sampler (see ``circuit_sampler``).
+    - kwargs: Passed to ``adaptive_fidelity_estimate``.
+
+    Returns:
+    - best: Name of the candidate with the highest estimated fidelity.
+    - estimates: Mapping of candidate name -> estimate dictionary.
+    - total_shots: Shots spent across all candidates.
+    """
+    estimates = {}
+    best, best_lower_bound = None, None
+    for name, sampler in samplers.items():
+        estimate = adaptive_fidelity_estimate(sampler, best_lower_bound=best_lower_bound, **kwargs)
+        estimates[name] = estimate
+        if best is None or estimate['fidelity'] > estimates[best]['fidelity']:
+            best = name
+            best_lower_bound = estimate['interval'][0]
+    total_shots = sum(estimate['shots'] for estimate in estimates.values())
+    return best, estimates, total_shots
@@ -0,0 +1,60 @@
+import cirq
+
+
+def _is_pauli(op):
+    return len(op.qubits) == 1 and isinstance(op.gate, cirq.Pauli)
+
+
+def _is_wait(op):
+    return (len(op.qubits) == 1 and isinstance(op.gate, cirq.WaitGate)
+            and not cirq.is_parameterized(op))
+
+
+def simplify_circuit(circuit, cancel_paulis=True, merge_waits=True):
+    """
+    Simplify a circuit before simulation without changing its noise semantics.
+
+    Adjacent identical Pauli pairs on a qubit are cancelled, adjacent wait gates
+    on a qubit are merged into one, and the remaining operations are packed into
+    as few moments as possible. Only operations that are directly adjacent on a
+    qubit are touched: noise channels, measurements and multi-qubit gates act as
+    barriers. Do not use this with a noise model that inserts noise after every
+    gate (such as ``AdvancedNoiseModel``), since cancelled pulses would also drop
+    their noise; ``DecoherenceNoiseModel`` is unaffected.
+
+    Parameters:
+    - circuit: The cirq.Circuit to simplify.
+    - cancel_paulis: Whether to cancel X·X, Y·Y and Z·Z pairs.
+    - merge_waits: Whether to merge adjacent wait gates.
+
+    Returns:
+    - simplified: The simplified cirq.Circuit.
+    - report: Dictionary with 'operations_removed' and 'moments_removed'.
+    """
+    operations = []
+    stacks = {}  # qubit -> indices into ``operations`` of still-live ops
+
+    for op in circuit.all_operations():
+        if len(op.qubits) == 1:
+            qubit, = op.qubits
+            stack = stacks.setdefault(qubit, [])
+            previous = operations[stack[-1]] if stack else None
+
+            if cancel_paulis and previous is not None and _is_pauli(op) and previous == op:
+                operations[stack.pop()] = None
+                continue
+            if merge_waits and previous is not None and _is_wait(op) and _is_wait(previous):
+                duration = previous.gate.duration + op.gate.duration
+                operations[stack[-1]] = cirq.WaitGate(duration).on(qubit)
+                continue
+
+        for qubit in op.qubits:
+            stacks.setdefault(qubit, []).append(len(operations))
+        operations.append(op)
+
+    simplified = cirq.Circuit(op for op in operations if op is not None)
+    report = {
+        'operations_removed': len(list(circuit.all_operations())) - len(list(simplified.all_operations())),
+        'moments_removed': len(circuit) - len(simplified),
+    }
+    return simplified, report
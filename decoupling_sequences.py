@@ -1,30 +1,38 @@
 import cirq
 import numpy as np
+from filter_functions import select_sequence
+from tracing import BUILD, traced
 
+@traced(BUILD)
 def udd_sequence(qubit, n, total_duration):
     """
     Implements the Uhrig Dynamical Decoupling (UDD) sequence for a given qubit.
+
+    ``total_duration`` may be a sympy expression (e.g. ``parameter_sweeps.TOTAL_DURATION``),
+    in which case the delays stay symbolic instead of being rounded to whole ns.
     """
     udd_circuit = cirq.Circuit()
     
     def tj(j):
         return total_duration * np.sin(np.pi * j / (2 * n + 2))**2
 
+    symbolic = cirq.is_parameterized(total_duration)
     last_t = 0
     for j in range(1, n + 1):
-        t = int(round(tj(j)))
+        t = tj(j) if symbolic else int(round(tj(j)))
         delay_duration = t - last_t
-        if delay_duration > 0:
+        if symbolic or delay_duration > 0:
             udd_circuit.append(cirq.WaitGate(cirq.Duration(nanos=delay_duration)).on(qubit))
         udd_circuit.append(cirq.X(qubit))
         last_t = t
 
     final_delay = total_duration - last_t
-    if final_delay > 0:
+    if symbolic or final_delay > 0:
         udd_circuit.append(cirq.WaitGate(cirq.Duration(nanos=final_delay)).on(qubit))
 
     return udd_circuit
 
+@traced(BUILD)
 def cdd_sequence(qubit, levels):
     """
     Implements the Concatenated Dynamical Decoupling (CDD) sequence.
@@ -36,9 +44,12 @@ def cdd_sequence(qubit, levels):
     cdd_circuit = cirq.Circuit(base_sequence, cirq.X(qubit), base_sequence)
     return cdd_circuit
 
+@traced(BUILD)
 def cpmg_sequence(qubit, n, tau):
     """
     Implements the Carr-Purcell-Meiboom-Gill (CPMG) sequence for a given qubit.
+
+    ``tau`` may be a sympy expression such as ``parameter_sweeps.TAU``.
     """
     cpmg_circuit = cirq.Circuit()
     for _ in range(n):
@@ -47,15 +58,12 @@ def cpmg_sequence(qubit, n, tau):
     cpmg_circuit.append(cirq.WaitGate(cirq.Duration(nanos=tau)).on(qubit))
     return cpmg_circuit
 
-def choose_decoupling_sequence(qubit, noise_profile):
+def choose_decoupling_sequence(qubit, noise_profile, total_duration=1000):
     """
     Chooses an optimal decoupling sequence based on the qubit's noise profile.
+
+    Candidate families and pulse counts are ranked by their filter functions
+    against the profile's noise spectrum (see ``filter_functions``).
     """
-    if noise_profile["low_frequency_noise"] > noise_profile["high_frequency_noise"]:
-        chosen_sequence = udd_sequence(qubit, n=5, total_duration=1000)
-    elif noise_profile["high_frequency_noise"] > noise_profile["low_frequency_noise"]:
-        chosen_sequence = cdd_sequence(qubit, levels=3)
-    else:
-        chosen_sequence = cpmg_sequence(qubit, n=10, tau=100)
-    
-    return chosen_sequence
+    _, _, schedule = select_sequence(noise_profile, total_duration)
+    return schedule.to_circuit(qubit)
@@ -0,0 +1,94 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import cirq
+import numpy as np
+
+from main import cdd_sequence, cpmg_sequence, simulate_sequence, udd_sequence
+
+SEQUENCE_FUNCTIONS = {
+    'UDD': udd_sequence,
+    'CPMG': cpmg_sequence,
+    'CDD': cdd_sequence,
+}
+
+
+def noise_profile_from_strength(strength):
+    """
+    Noise profile with every component set to the same strength.
+    """
+    return {
+        'low_frequency_noise': strength,
+        'high_frequency_noise': strength,
+        'correlated_noise': strength,
+    }
+
+
+def experiment_grid(families, pulse_counts, noise_profiles, seeds=(0,), root_seed=0):
+    """
+    Expand a sequence × pulse-count × noise-profile × seed grid into job dictionaries.
+
+    Every job gets its own simulator seed spawned from
+    ``numpy.random.SeedSequence(root_seed)``, so results depend only on the job's
+    position in the grid, never on which worker ran it or in what order.
+
+    Parameters:
+    - families: Sequence family names (keys of ``SEQUENCE_FUNCTIONS``).
+    - pulse_counts: Pulse counts (or CDD levels) to sweep.
+    - noise_profiles: Noise profile dictionaries, or scalar strengths.
+    - seeds: Replicate labels; each produces an independent run.
+    - root_seed: Entropy for the seed sequence.
+
+    Returns:
+    - jobs: List of job dictionaries.
+    """
+    profiles = [
+        p if isinstance(p, dict) else noise_profile_from_strength(p) for p in noise_profiles
+    ]
+    combinations = list(itertools.product(families, pulse_counts, range(len(profiles)), seeds))
+    children = np.random.SeedSequence(root_seed).spawn(len(combinations))
+
+    jobs = []
+    for index, ((family, num_pulses, profile_index, replicate), child) in enumerate(zip(combinations, children)):
+        jobs.append({
+            'index': index,
+            'family': family,
+            'num_pulses': num_pulses,
+            'noise_profile': profiles[profile_index],
+            'replicate': replicate,
+            'seed': int(child.generate_state(1)[0]),
+        })
+    return jobs
+
+
+def run_job(job, total_duration=100, num_cycles=100, repetitions=1000):
+    """
+    Run one ``simulate_sequence`` job with its own seeded density-matrix simulator.
+    """
+    qubit = cirq.NamedQubit("qubit")
+    simulator = cirq.DensityMatrixSimulator(seed=job['seed'])
+    measurements = simulate_sequence(
+        qubit, simulator, SEQUENCE_FUNCTIONS[job['family']], job['noise_profile'],
+        total_duration=total_duration, num_cycles=num_cycles, repetitions=repetitions,
+        num_pulses=job['num_pulses'],
+    )
+    return {**job, 'measurements': measurements, 'mean_fidelity': float(np.mean(measurements))}
+
+
+def _run_chunk(jobs, kwargs):
+    return [run_job(job, **kwargs) for job in jobs]
+
+
+def run_experiments(jobs, max_workers=None, chunksize=4, **kwargs):
+    """
+    Run jobs across a process pool and yield results as soon as each chunk finishes.
+
+    Jobs are submitted in chunks of ``chunksize`` to amortize inter-process
+    overhead. Results arrive in completion order; use the job's ``index`` to
+    restore grid order. Extra keyword arguments are passed to ``run_job``.
+    """
+    chunks = [jobs[i:i + chunksize] for i in range(0, len(jobs), chunksize)]
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_run_chunk, chunk, kwargs) for chunk in chunks]
+        for future in as_completed(futures):
+            yield from future.result()
@@ -2,48 +2,103 @@
 
 import cirq
 
-def fault_tolerant_encoding_with_flag():
-    """Implement fault-tolerant encoding using a five-qubit code with flag qubits."""
+# Stabilizer generators of the [[5,1,3]] code: cyclic shifts of XZZXI
+FIVE_QUBIT_STABILIZERS = ['XZZXI', 'IXZZX', 'XIXZZ', 'ZXIXZ']
+
+_CONTROLLED_PAULIS = {
+    'X': cirq.ControlledGate(cirq.X),
+    'Y': cirq.ControlledGate(cirq.Y),
+    'Z': cirq.ControlledGate(cirq.Z),
+}
+
+
+def fault_tolerant_encoding_with_flag(rounds=1, measure_logical_x=False, noise=None):
+    """
+    Implement fault-tolerant encoding using a five-qubit code with flag qubits.
+
+    The data qubits are encoded noiselessly into the logical |+⟩ codeword, so
+    every stabilizer starts at +1 and the first round can be decoded against
+    known signs. After the ``rounds`` flagged rounds one more clean round and
+    the data readout follow, giving the decoder an exact final syndrome.
+
+    Parameters:
+    - rounds: Number of stabilizer measurement rounds. Round ``r`` writes to the
+      keys ``syndrome_{r}_{i}`` and ``flag_{r}_{i}`` for stabilizer ``i``; the
+      clean round uses ``r = rounds``.
+    - measure_logical_x: Rotate the data qubits before readout so that the
+      parity of the ``result_*`` bits is the logical X eigenvalue.
+    - noise: Optional cirq noise model or channel applied to the ``rounds``
+      flagged rounds only.
+    """
     # Define qubits: 5 data qubits, 1 auxiliary qubit, 1 flag qubit
     data_qubits = [cirq.NamedQubit(f'q{i}') for i in range(5)]
     auxiliary_qubit = cirq.NamedQubit('aux')
     flag_qubit = cirq.NamedQubit('flag')
 
-    # Initialize circuit
-    circuit = cirq.Circuit()
-
-    # Apply the encoding circuit for the five-qubit code
-    # Initialize data qubits into superposition
-    for qubit in data_qubits:
-        circuit.append(cirq.H(qubit))
+    # Implement fault-tolerant stabilizer measurements with flag qubits
+    noisy_rounds = cirq.Circuit()
+    for round_index in range(rounds):
+        noisy_rounds += flagged_stabilizer_round(round_index, data_qubits, auxiliary_qubit, flag_qubit)
+    if noise is not None:
+        noisy_rounds = noisy_rounds.with_noise(noise)
 
-    # Define stabilizer generators for the five-qubit code
-    # Example stabilizers (correct stabilizer set should be used for specific code):
-    stabilizers = [
-        cirq.X(data_qubits[0]) * cirq.X(data_qubits[1]) * cirq.X(data_qubits[2]) * cirq.X(data_qubits[3]),
-        cirq.Z(data_qubits[1]) * cirq.Z(data_qubits[2]) * cirq.Z(data_qubits[3]) * cirq.Z(data_qubits[4]),
-        cirq.X(data_qubits[0]) * cirq.X(data_qubits[1]) * cirq.Z(data_qubits[3]) * cirq.Z(data_qubits[4]),
-        cirq.Y(data_qubits[0]) * cirq.Y(data_qubits[2]) * cirq.Y(data_qubits[4])
-    ]
+    circuit = encode_logical_plus(data_qubits)
+    circuit += noisy_rounds
+    circuit += flagged_stabilizer_round(rounds, data_qubits, auxiliary_qubit, flag_qubit)
 
-    # Implement fault-tolerant stabilizer measurements with flag qubits
-    for stabilizer in stabilizers:
-        # Prepare the flag qubit
-        circuit.append(cirq.H(flag_qubit))
-
-        # Measure the stabilizer using controlled operations
-        for pauli in stabilizer.paulistring:
-            circuit.append(cirq.ControlledGate(pauli).on(flag_qubit, *stabilizer.qubits))
-
-        # Read out the flag qubit to check for measurement errors
-        circuit.append(cirq.H(flag_qubit))
-        circuit.append(cirq.measure(flag_qubit, key='flag'))
-        
-        # If the flag is set, repeat the stabilizer measurement
-        circuit.append(cirq.IfElseFlag(flag_qubit))
-        
     # Measure all data qubits
+    if measure_logical_x:
+        circuit.append(cirq.H.on_each(*data_qubits))
     for qubit in data_qubits:
         circuit.append(cirq.measure(qubit, key=f'result_{qubit}'))
 
     return circuit
+
+
+def encode_logical_plus(data_qubits):
+    """
+    Prepare the five-qubit code's logical |+⟩, the +1 eigenstate of every
+    stabilizer and of the logical X = XXXXX.
+
+    The ring graph state is locally equivalent to the code space; a Z on every
+    qubit fixes the sign of the logical X.
+    """
+    circuit = cirq.Circuit(cirq.H.on_each(*data_qubits))
+    circuit.append(cirq.CZ(a, b) for a, b in zip(data_qubits, data_qubits[1:] + data_qubits[:1]))
+    circuit.append(cirq.Z.on_each(*data_qubits))
+    return circuit
+
+
+def flagged_stabilizer_round(round_index, data_qubits, auxiliary_qubit, flag_qubit):
+    """
+    One round of flagged measurements of all ``FIVE_QUBIT_STABILIZERS``.
+    """
+    circuit = cirq.Circuit()
+    for index, stabilizer in enumerate(FIVE_QUBIT_STABILIZERS):
+        append_flagged_measurement(circuit, stabilizer, data_qubits, auxiliary_qubit, flag_qubit,
+                                    f'{round_index}_{index}')
+    return circuit
+
+
+def append_flagged_measurement(circuit, stabilizer, data_qubits, auxiliary_qubit, flag_qubit, suffix):
+    """Append one flagged measurement of ``stabilizer`` to ``circuit``."""
+    # Prepare the auxiliary qubit in |+⟩ and the flag qubit in |0⟩
+    circuit.append([cirq.reset(auxiliary_qubit), cirq.reset(flag_qubit)])
+    circuit.append(cirq.H(auxiliary_qubit))
+
+    # Measure the stabilizer using controlled operations. The flag is coupled
+    # after the first and before the last one, so a single fault on the
+    # auxiliary qubit that spreads to two or more data qubits trips it.
+    support = [(pauli, qubit) for pauli, qubit in zip(stabilizer, data_qubits) if pauli != 'I']
+    for position, (pauli, qubit) in enumerate(support):
+        if position == len(support) - 1:
+            circuit.append(cirq.CNOT(auxiliary_qubit, flag_qubit))
+        circuit.append(_CONTROLLED_PAULIS[pauli].on(auxiliary_qubit, qubit))
+        if position == 0:
+            circuit.append(cirq.CNOT(auxiliary_qubit, flag_qubit))
+
+    # Read out the syndrome and the flag qubit to check for measurement errors.
+    # A set flag is handled by the decoder rather than by classical control.
+    circuit.append(cirq.H(auxiliary_qubit))
+    circuit.append(cirq.measure(auxiliary_qubit, key=f'syndrome_{suffix}'))
+    circuit.append(cirq.measure(flag_qubit, key=f'flag_{suffix}'))
@@ -0,0 +1,127 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cirq
+import numpy as np
+
+from real_time_feedback import real_time_feedback_control
+
+
+class MockDeviceBackend:
+    """
+    In-process stand-in for a hardware backend.
+
+    Circuits run on a Cirq simulator in an executor so the event loop stays
+    free, and each job is delayed by ``latency_s`` plus uniform ``jitter_s``
+    to mimic queueing and control-electronics overhead. Use it as a context
+    manager or call ``close`` to shut down the executor it creates; an
+    executor passed in by the caller is left running.
+    """
+
+    def __init__(self, simulator=None, latency_s=0.0, jitter_s=0.0, executor=None, seed=None):
+        self.simulator = simulator or cirq.Simulator(seed=seed)
+        self.latency_s = latency_s
+        self.jitter_s = jitter_s
+        self._owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(max_workers=1)
+        self.rng = np.random.default_rng(seed)
+
+    def close(self):
+        if self._owns_executor:
+            self.executor.shutdown(wait=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+    async def run(self, circuit, repetitions):
+        delay = self.latency_s + self.jitter_s * self.rng.random()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, self.simulator.run, circuit, None, repetitions)
+
+
+def latency_percentiles(latencies, percentiles=(50, 90, 99)):
+    """
+    Latency percentiles in seconds, keyed like 'p50'.
+    """
+    values = np.percentile(latencies, percentiles) if len(latencies) else [np.nan] * len(percentiles)
+    return {f'p{p}': float(v) for p, v in zip(percentiles, values)}
+
+
+async def run_feedback_pipeline(qubit, backend, sequence, time_steps=100, repetitions=1000,
+                                queue_size=2, latency_budget_s=None):
+    """
+    Real-time feedback loop as three overlapping asyncio stages.
+
+    Circuit generation, execution on ``backend`` and histogram analysis run as
+    separate coroutines joined by bounded queues, so the circuit for step k + 1
+    is built while step k executes. Each circuit uses the most recent decision
+    available when it is built; ``queue_size`` bounds how far generation can
+    run ahead of the analysed results.
+
+    Parameters:
+    - qubit: The qubit under feedback control.
+    - backend: Object with an ``async run(circuit, repetitions)`` method.
+    - sequence: Decoupling sequence placed before every feedback step.
+    - time_steps: Number of feedback iterations.
+    - repetitions: Shots per iteration.
+    - queue_size: Capacity of each inter-stage queue.
+    - latency_budget_s: Optional per-iteration budget to check the percentiles against.
+
+    Returns:
+    - report: Dictionary with 'histograms', 'latencies' (circuit creation to
+      analysed result, including queueing), their 'percentiles', the backend-only
+      'execution_percentiles', 'wall_time' and, if a budget is given,
+      'meets_budget' (end-to-end p99 within budget).
+    """
+    to_execute = asyncio.Queue(maxsize=queue_size)
+    to_analyze = asyncio.Queue(maxsize=queue_size)
+    base = cirq.Circuit(sequence)
+    base.append(cirq.H(qubit))
+    latest = {'histogram': {0: 1, 1: 0}}
+    histograms, latencies, execution_times = [], [], []
+
+    async def generate():
+        for step in range(time_steps):
+            circuit = real_time_feedback_control(base, latest['histogram'], {}, qubit)
+            await to_execute.put((step, circuit, time.perf_counter()))
+        await to_execute.put(None)
+
+    async def execute():
+        while (job := await to_execute.get()) is not None:
+            step, circuit, created = job
+            started = time.perf_counter()
+            result = await backend.run(circuit, repetitions)
+            execution_times.append(time.perf_counter() - started)
+            await to_analyze.put((step, result, created))
+        await to_analyze.put(None)
+
+    async def analyze():
+        while (job := await to_analyze.get()) is not None:
+            step, result, created = job
+            histogram = result.histogram(key='result')
+            latest['histogram'] = histogram
+            histograms.append(histogram)
+            latencies.append(time.perf_counter() - created)
+
+    start = time.perf_counter()
+    await asyncio.gather(generate(), execute(), analyze())
+    wall_time = time.perf_counter() - start
+
+    latencies = np.array(latencies)
+    report = {
+        'histograms': histograms,
+        'latencies': latencies,
+        'percentiles': latency_percentiles(latencies),
+        'execution_percentiles': latency_percentiles(execution_times),
+        'wall_time': wall_time,
+    }
+    if latency_budget_s is not None:
+        report['meets_budget'] = report['percentiles']['p99'] <= latency_budget_s
+    return report
@@ -1,9 +1,16 @@
 import cirq
 import numpy as np
-from collections import Counter
-import matplotlib.pyplot as plt
+from backend_selection import CIRQ_BACKENDS, choose_backend, simulator_for
+from benchmarking import adaptive_candidate_search, circuit_sampler
+from circuit_optimization import simplify_circuit
+from measurement_store import MeasurementStore
+from parameter_sweeps import TOTAL_DURATION, apply_symbolic_noise, noise_profile_sweep, sweep_probabilities
+from qubit_characterization import measure_t1_t2_sweep
+from result_cache import cached_run
+from tracing import BUILD, NOISE, POSTPROCESS, SIMULATE, measurement_bytes, span, traced
 
 # Noise model refinement: adding more realistic noise profiles
+@traced(NOISE)
 def apply_realistic_noise(qubit, circuit, noise_profile):
     """
     Apply realistic noise to the circuit.
@@ -21,47 +28,16 @@ def apply_realistic_noise(qubit, circuit, noise_profile):
     circuit.append(high_freq_noise(qubit))
     circuit.append(correlated_noise(qubit))
 
-def measure_t1_t2(qubit, simulator):
+def measure_t1_t2(qubit, simulator, delays_ns=None, repetitions=1000, seed=None, cache=None):
     """
-    Measure T1 and T2 times for the given qubit using a more refined method.
+    Measure T1 and T2 times for the given qubit from a fitted delay sweep.
     """
-    delays_ns = np.linspace(0, 100, 100)
-    circuit_t1 = cirq.Circuit()
-    circuit_t2 = cirq.Circuit()
-
-    # Create circuits with unique keys for measurements
-    for i, delay_ns in enumerate(delays_ns):
-        # Use wait gate to simulate delay for T1
-        circuit_t1.append(cirq.wait(qubit, duration=cirq.Duration(nanos=delay_ns)))
-        # Measure the state after the wait time with a unique key
-        circuit_t1.append(cirq.measure(qubit, key=f'result_t1_{i}'))
-
-        # For T2, include X gates to refocus and remove phase errors
-        circuit_t2.append(cirq.wait(qubit, duration=cirq.Duration(nanos=delay_ns)))
-        circuit_t2.append(cirq.X(qubit))
-        circuit_t2.append(cirq.wait(qubit, duration=cirq.Duration(nanos=delay_ns)))
-        circuit_t2.append(cirq.X(qubit))
-        circuit_t2.append(cirq.measure(qubit, key=f'result_t2_{i}'))
-
-    # Simulate circuits
-    result_t1 = simulator.run(circuit_t1, repetitions=1000)
-    result_t2 = simulator.run(circuit_t2, repetitions=1000)
-
-    # Correctly access and count the measurement results
-    t1_counts = sum(result_t1.measurements[f'result_t1_{i}'][:, 0].sum() for i in range(len(delays_ns)))
-    t2_counts = sum(result_t2.measurements[f'result_t2_{i}'][:, 0].sum() for i in range(len(delays_ns)))
-
-    # Calculate probabilities
-    p0_t1 = t1_counts / (1000 * len(delays_ns))
-    p0_t2 = t2_counts / (1000 * len(delays_ns))
-
-    # Determine T1 and T2 times based on decay probability
-    t1_time = delays_ns[np.argmax(p0_t1 < 0.37)]  # 37% probability corresponds to T1 decay
-    t2_time = delays_ns[np.argmax(p0_t2 < 0.37)]  # 37% probability corresponds to T2 decay
-
-    return t1_time, t2_time
+    result = measure_t1_t2_sweep(qubit, simulator, delays_ns=delays_ns, repetitions=repetitions,
+                                 seed=seed, cache=cache)
+    return result['t1'], result['t2']
 
 
+@traced(BUILD)
 def udd_sequence(qubit, total_duration, num_pulses):
     """
     Generate an UDD sequence based on optimized pulse placement.
@@ -73,6 +49,7 @@ def udd_sequence(qubit, total_duration, num_pulses):
         circuit.append(cirq.X(qubit))
     return circuit
 
+@traced(BUILD)
 def cpmg_sequence(qubit, total_duration, num_pulses):
     """
     Generate a CPMG sequence based on optimized pulse spacing.
@@ -87,6 +64,7 @@ def cpmg_sequence(qubit, total_duration, num_pulses):
         circuit.append(cirq.wait(qubit, duration=cirq.Duration(nanos=tau)))
     return circuit
 
+@traced(BUILD)
 def cdd_sequence(qubit, total_duration, level):
     """
     Generate a CDD sequence based on concatenation levels.
@@ -119,44 +97,123 @@ def adaptive_control(qubit, simulator, noise_profile, max_cycles=100):
 
     plot_results([r[1] for r in results], [r[0] for r in results])
 
-def simulate_sequence(qubit, simulator, sequence_func, noise_profile, total_duration=100):
+def simulate_sequence(qubit, simulator, sequence_func, noise_profile, total_duration=100,
+                      num_cycles=100, repetitions=1000, batched=True, optimize=False, num_pulses=10,
+                      cache=None, seed=None):
     """
     Simulate a given decoupling sequence under realistic noise conditions.
-    """
-    num_pulses = 10
-    measurements = []
 
-    for _ in range(100):
-        circuit = cirq.Circuit()
+    With ``batched=True`` the circuit is built once and sampled
+    ``num_cycles * repetitions`` times in a single simulator call; the bit
+    array is then reshaped into one row per measurement cycle. Paired with a
+    ``cirq.DensityMatrixSimulator`` this is a single simulation plus sampling.
+
+    With a ``seed`` the samples are drawn by ``result_cache.cached_run`` from
+    the seed, the circuit and the simulator noise, so they are reproducible
+    and can be looked up in a ``ResultCache`` passed as ``cache`` before
+    anything is simulated; unseeded runs are never cached.
+    """
+    def build_sequence():
         sequence = sequence_func(qubit, total_duration, num_pulses)
-        circuit += sequence
+        if optimize:
+            sequence, report = simplify_circuit(sequence)
+            print(f"Simplified sequence: removed {report['operations_removed']} operations, "
+                  f"{report['moments_removed']} moments")
+        return sequence
+
+    if not batched:
+        store = MeasurementStore()
+        for cycle in range(num_cycles):
+            circuit = cirq.Circuit()
+            circuit += build_sequence()
+            apply_realistic_noise(qubit, circuit, noise_profile)
+            circuit.append(cirq.measure(qubit, key='result'))
+            with span('simulator.run', SIMULATE, repetitions=repetitions, circuit=circuit) as current:
+                result = cached_run(simulator, circuit, repetitions, cache=cache, seed=seed, cycle=cycle)
+                current.set(measurement_bytes=lambda: measurement_bytes(result.measurements))
+            with span('MeasurementStore.append', POSTPROCESS, repetitions=repetitions):
+                store.append('result', result.measurements['result'], cycle=cycle)
+        with span('MeasurementStore.probabilities', POSTPROCESS):
+            return store.probabilities('result').tolist()  # Probability of measuring |0⟩
+
+    circuit = cirq.Circuit()
+    circuit += build_sequence()
+    apply_realistic_noise(qubit, circuit, noise_profile)
+    circuit.append(cirq.measure(qubit, key='result'))
+    with span('simulator.run', SIMULATE, repetitions=num_cycles * repetitions, circuit=circuit) as current:
+        result = cached_run(simulator, circuit, num_cycles * repetitions, cache=cache, seed=seed)
+        current.set(measurement_bytes=lambda: measurement_bytes(result.measurements))
+
+    # One row per cycle; the mean of the |0⟩ indicator is the per-cycle probability
+    with span('cycle_probabilities', POSTPROCESS, repetitions=num_cycles * repetitions):
+        bits = result.measurements['result'][:, 0].reshape(num_cycles, repetitions)
+        return np.mean(bits == 0, axis=1).tolist()
+
+def simulate_sequence_sweep(qubit, simulator, sequence_func, durations, noise_profiles,
+                            num_pulses=10, repetitions=1000):
+    """
+    Simulate a decoupling sequence over a grid of durations and noise profiles.
+
+    The sequence is built once with a symbolic total duration and symbolic noise
+    strengths, and ``simulator.run_sweep`` resolves it at every grid point, so
+    the circuit is constructed once per grid instead of once per point.
+
+    Returns:
+    - probabilities: Array of shape (len(noise_profiles), len(durations)) with
+      the probability of measuring |0⟩.
+    """
+    circuit = sequence_func(qubit, TOTAL_DURATION, num_pulses)
+    apply_symbolic_noise(qubit, circuit)
+    circuit.append(cirq.measure(qubit, key='result'))
+    sweep = noise_profile_sweep(noise_profiles, total_duration=durations)
+    _, probabilities = sweep_probabilities(simulator, circuit, sweep, repetitions=repetitions)
+    return probabilities.reshape(len(noise_profiles), len(durations))
+
+def adaptive_sequence_search(qubit, simulator, noise_profile, total_duration=100, num_pulses=10, **kwargs):
+    """
+    Pick the best decoupling sequence with adaptive shot allocation.
+
+    Instead of a fixed 1000 repetitions per candidate, shots are spent in
+    growing batches until each fidelity is settled or clearly worse than the
+    best so far. Extra keyword arguments go to ``adaptive_fidelity_estimate``.
+    """
+    samplers = {}
+    for func, name in zip([udd_sequence, cpmg_sequence, cdd_sequence], ['UDD', 'CPMG', 'CDD']):
+        circuit = func(qubit, total_duration, num_pulses)
         apply_realistic_noise(qubit, circuit, noise_profile)
         circuit.append(cirq.measure(qubit, key='result'))
-        result = simulator.run(circuit, repetitions=1000)
-        count = Counter(result.data['result'].to_numpy().flatten())
-        measurements.append(count[0] / 1000)  # Probability of measuring |0⟩
+        samplers[name] = circuit_sampler(circuit, simulator)
 
-    return measurements
+    best, estimates, total_shots = adaptive_candidate_search(samplers, **kwargs)
+    for name, estimate in estimates.items():
+        print(f"{name}: fidelity {estimate['fidelity']:.4f} after {estimate['shots']} shots ({estimate['stopped']})")
+    print(f"Best sequence: {best} using {total_shots} shots in total")
+    return best, estimates
 
-def plot_results(results, labels):
+def plot_results(results, labels, output_path=None):
     """
     Plot the results of the decoupling sequence simulations.
+
+    matplotlib is imported only here. With ``output_path`` the figure is
+    written there and closed instead of shown, which works without a display.
     """
+    import matplotlib.pyplot as plt
+
+    plt.figure()
     for result, label in zip(results, labels):
         plt.plot(result, label=label)
     plt.xlabel('Measurement Cycle')
     plt.ylabel('Probability of |0⟩')
     plt.title('Qubit Fidelity During Measurement')
     plt.legend()
-    plt.show()
+    if output_path is None:
+        plt.show()
+    else:
+        plt.savefig(output_path)
+        plt.close()
 
 def main():
     qubit = cirq.NamedQubit("qubit")
-    simulator = cirq.Simulator()
-
-    # Measure T1 and T2 times
-    t1_time, t2_time = measure_t1_t2(qubit, simulator)
-    print(f"Measured T1 Time: {t1_time:.2f} ns, T2 Time: {t2_time:.2f} ns")
 
     # Noise profile setup
     noise_profile = {
@@ -166,6 +223,18 @@ def main():
     }
     print(f"Noise Profile: {noise_profile}")
 
+    # Pick the simulator from a representative noisy sequence circuit
+    representative = cpmg_sequence(qubit, 100, 10)
+    apply_realistic_noise(qubit, representative, noise_profile)
+    representative.append(cirq.measure(qubit, key='result'))
+    plan = choose_backend(representative, repetitions=100 * 1000, allowed=CIRQ_BACKENDS)
+    simulator = simulator_for(plan)
+    print(f"Simulator backend: {plan['backend']} (estimated {plan['estimated_seconds']:.2f} s)")
+
+    # Measure T1 and T2 times
+    t1_time, t2_time = measure_t1_t2(qubit, simulator)
+    print(f"Measured T1 Time: {t1_time:.2f} ns, T2 Time: {t2_time:.2f} ns")
+
     # Start adaptive control
     adaptive_control(qubit, simulator, noise_profile)
 
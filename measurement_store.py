@@ -0,0 +1,131 @@
+import os
+
+import cirq
+import numpy as np
+
+# Per-value histograms are kept for keys up to this many bits
+MAX_HISTOGRAM_WIDTH = 16
+
+INDEX_DTYPE = np.dtype([('key', 'U128'), ('cycle', 'i8'), ('shots', 'i8'), ('width', 'i8')])
+
+
+class MeasurementStore:
+    """
+    Bit-packed store of measurement shots, grouped by key and cycle.
+
+    Shots are kept as ``np.packbits`` arrays (eight shots per byte) and the store
+    grows by appending chunks. Running histograms per key and cycle are updated
+    on every append, so counts and per-cycle probabilities never need the
+    unpacked data.
+    """
+
+    def __init__(self):
+        self._chunks = {}      # (key, cycle) -> list of (packed bits, shots)
+        self._widths = {}      # key -> number of bits per shot
+        self._histograms = {}  # (key, cycle) -> counts per measured value
+
+    def append(self, key, bits, cycle=0):
+        """
+        Append shots for ``key`` in ``cycle``; ``bits`` has shape (shots,) or (shots, width).
+        """
+        bits = np.asarray(bits, dtype=np.uint8)
+        if bits.ndim == 1:
+            bits = bits[:, None]
+        shots, width = bits.shape
+        if self._widths.setdefault(key, width) != width:
+            raise ValueError(f"Key '{key}' holds {self._widths[key]}-bit shots, got {width} bits.")
+
+        self._chunks.setdefault((key, cycle), []).append((np.packbits(bits, axis=0), shots))
+        if width <= MAX_HISTOGRAM_WIDTH:
+            self._update_histogram(key, cycle, bits)
+
+    def append_counts(self, key, counts, cycle=0):
+        """
+        Append single-bit shots given as a ``{0: n0, 1: n1}`` histogram.
+        """
+        bits = np.repeat(np.array([0, 1], dtype=np.uint8), [counts.get(0, 0), counts.get(1, 0)])
+        self.append(key, bits, cycle)
+
+    def _update_histogram(self, key, cycle, bits):
+        width = bits.shape[1]
+        # Big-endian integer per shot, matching cirq's histogram convention
+        values = bits.astype(np.int64) @ (1 << np.arange(width - 1, -1, -1))
+        counts = np.bincount(values, minlength=2 ** width)
+        histogram = self._histograms.get((key, cycle))
+        self._histograms[(key, cycle)] = counts if histogram is None else histogram + counts
+
+    def _check_histogram(self, key):
+        if self._widths[key] > MAX_HISTOGRAM_WIDTH:
+            raise ValueError(f"No histogram is kept for key '{key}' wider than {MAX_HISTOGRAM_WIDTH} bits.")
+
+    def keys(self):
+        return list(self._widths)
+
+    def cycles(self, key):
+        return sorted(cycle for k, cycle in self._chunks if k == key)
+
+    def shots(self, key, cycle=None):
+        cycles = self.cycles(key) if cycle is None else [cycle]
+        return sum(shots for c in cycles for _, shots in self._chunks.get((key, c), []))
+
+    def bits(self, key, cycle=None):
+        """
+        Unpacked shots of shape (shots, width), for one cycle or all cycles in order.
+        """
+        cycles = self.cycles(key) if cycle is None else [cycle]
+        chunks = [
+            np.unpackbits(packed, axis=0, count=shots)
+            for c in cycles for packed, shots in self._chunks.get((key, c), [])
+        ]
+        if not chunks:
+            return np.zeros((0, self._widths.get(key, 1)), dtype=np.uint8)
+        return np.concatenate(chunks)
+
+    def histogram(self, key, cycle=None):
+        """
+        Running ``{value: count}`` histogram for one cycle or summed over all cycles.
+        """
+        self._check_histogram(key)
+        cycles = self.cycles(key) if cycle is None else [cycle]
+        counts = sum(self._histograms[(key, c)] for c in cycles)
+        return {value: int(n) for value, n in enumerate(np.atleast_1d(counts)) if n}
+
+    def probabilities(self, key, value=0):
+        """
+        Per-cycle probability of measuring ``value`` (|0⟩ by default), in cycle order.
+        """
+        self._check_histogram(key)
+        cycles = self.cycles(key)
+        histograms = np.array([self._histograms[(key, c)] for c in cycles], dtype=float)
+        return histograms[:, value] / histograms.sum(axis=1)
+
+    def to_result_dict(self, params=None):
+        """
+        All shots of every key as a ``cirq.ResultDict``.
+        """
+        measurements = {key: self.bits(key) for key in self.keys()}
+        return cirq.ResultDict(params=params or cirq.ParamResolver({}), measurements=measurements)
+
+    def save(self, directory):
+        """
+        Save the packed shots as one ``.npy`` file per key and cycle plus an index.
+        """
+        os.makedirs(directory, exist_ok=True)
+        index = []
+        for i, (key, cycle) in enumerate(sorted(self._chunks)):
+            bits = self.bits(key, cycle)
+            np.save(os.path.join(directory, f'{i}.npy'), np.packbits(bits, axis=0))
+            index.append((key, cycle, bits.shape[0], bits.shape[1]))
+        np.save(os.path.join(directory, 'index.npy'), np.array(index, dtype=INDEX_DTYPE))
+
+    @classmethod
+    def load(cls, directory):
+        """
+        Load a store written by ``save``.
+        """
+        store = cls()
+        index = np.load(os.path.join(directory, 'index.npy'))
+        for i, (key, cycle, shots, width) in enumerate(index):
+            packed = np.load(os.path.join(directory, f'{i}.npy'))
+            store.append(str(key), np.unpackbits(packed, axis=0, count=int(shots)), int(cycle))
+        return store
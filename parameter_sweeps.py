@@ -0,0 +1,107 @@
+import itertools
+
+import cirq
+import numpy as np
+import sympy
+
+# Symbols shared by the parameterized sequence generators; the noise symbols
+# are named after the noise-profile keys so a profile resolves them directly
+TOTAL_DURATION = sympy.Symbol('total_duration')
+TAU = sympy.Symbol('tau')
+NOISE_SYMBOLS = {
+    name: sympy.Symbol(name)
+    for name in ('low_frequency_noise', 'high_frequency_noise', 'correlated_noise')
+}
+
+
+class ParameterizedChannel(cirq.Gate):
+    """
+    Placeholder for a Cirq noise channel whose strengths are sympy expressions.
+
+    Cirq's channel constructors reject symbols, so the channel is kept as its
+    factory and arguments and becomes a concrete channel when the circuit is
+    resolved, e.g. inside ``simulator.run_sweep``.
+    """
+
+    def __init__(self, factory, **params):
+        self.factory = factory
+        self.params = params
+
+    def _num_qubits_(self):
+        return 1
+
+    def _is_parameterized_(self):
+        return any(cirq.is_parameterized(value) for value in self.params.values())
+
+    def _parameter_names_(self):
+        return {name for value in self.params.values() for name in cirq.parameter_names(value)}
+
+    def _resolve_parameters_(self, resolver, recursive):
+        values = {name: resolver.value_of(value, recursive) for name, value in self.params.items()}
+        if any(cirq.is_parameterized(value) for value in values.values()):
+            return ParameterizedChannel(self.factory, **values)
+        return self.factory(**{name: float(value) for name, value in values.items()})
+
+    def __repr__(self):
+        args = ', '.join(f'{name}={value}' for name, value in self.params.items())
+        return f'ParameterizedChannel({self.factory.__name__}, {args})'
+
+    def _circuit_diagram_info_(self, args):
+        return f"{self.factory.__name__}({', '.join(str(v) for v in self.params.values())})"
+
+
+def apply_symbolic_noise(qubit, circuit, symbols=None):
+    """
+    Symbolic counterpart of ``main.apply_realistic_noise``.
+
+    Appends the same three channels with strengths given by ``symbols``
+    (``NOISE_SYMBOLS`` by default), so one circuit covers every noise profile.
+    """
+    symbols = symbols or NOISE_SYMBOLS
+    correlated = symbols['correlated_noise']
+    circuit.append(ParameterizedChannel(cirq.depolarize, p=symbols['low_frequency_noise']).on(qubit))
+    circuit.append(ParameterizedChannel(cirq.bit_flip, p=symbols['high_frequency_noise']).on(qubit))
+    circuit.append(ParameterizedChannel(cirq.asymmetric_depolarize,
+                                        p_x=correlated, p_y=correlated, p_z=correlated).on(qubit))
+
+
+def parameter_grid(**values):
+    """
+    Cartesian product sweep over named parameters, e.g.
+    ``parameter_grid(total_duration=[50, 100], low_frequency_noise=[0.01, 0.02])``.
+    """
+    return cirq.Product(*(cirq.Points(name, [float(v) for v in points]) for name, points in values.items()))
+
+
+def noise_profile_sweep(noise_profiles, **values):
+    """
+    Sweep over a list of noise-profile dictionaries, crossed with any extra
+    named parameter points.
+    """
+    profiles = cirq.ListSweep([{name: float(value) for name, value in profile.items()} for profile in noise_profiles])
+    if not values:
+        return profiles
+    return cirq.Product(profiles, parameter_grid(**values))
+
+
+def sweep_probabilities(simulator, circuit, sweep, repetitions=1000, key='result', value=0):
+    """
+    Run one parameterized circuit over a whole sweep with ``run_sweep``.
+
+    Returns:
+    - resolvers: List of parameter dictionaries, in sweep order.
+    - probabilities: Array with the probability of measuring ``value`` at each point.
+    """
+    results = simulator.run_sweep(circuit, params=sweep, repetitions=repetitions)
+    resolvers = [dict(result.params.param_dict) for result in results]
+    probabilities = np.array([np.mean(result.measurements[key][:, 0] == value) for result in results])
+    return resolvers, probabilities
+
+
+def grid_shape(sweep):
+    """
+    Shape of a product sweep, for reshaping results back onto the grid.
+    """
+    if isinstance(sweep, cirq.Product):
+        return tuple(itertools.chain.from_iterable(grid_shape(factor) for factor in sweep.factors))
+    return (len(sweep),)
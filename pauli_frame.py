@@ -0,0 +1,322 @@
+import functools
+import itertools
+
+import cirq
+import numpy as np
+
+WORD_BITS = 64
+_ALL_ONES = np.uint64(0xFFFFFFFFFFFFFFFF)
+_PAULI_BITS = {'I': (0, 0), 'X': (1, 0), 'Y': (1, 1), 'Z': (0, 1)}
+_PAULI_MATRICES = {
+    'I': np.eye(2),
+    'X': cirq.unitary(cirq.X),
+    'Y': cirq.unitary(cirq.Y),
+    'Z': cirq.unitary(cirq.Z),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def _symplectic(gate):
+    """
+    Binary images of each qubit's X and Z under a Clifford gate.
+
+    Returns (xs, zs) of shape (2k, k): row i (< k) is the image of X_i and row
+    k + i the image of Z_i. Signs are irrelevant for Pauli frames.
+    """
+    qubits = cirq.LineQubit.range(cirq.num_qubits(gate))
+    tableau = cirq.CliffordGate.from_op_list([gate.on(*qubits)], qubits).clifford_tableau
+    return tableau.xs.astype(bool), tableau.zs.astype(bool)
+
+
+@functools.lru_cache(maxsize=None)
+def _pauli_mixture(gate):
+    """
+    Decompose a Pauli channel into (probability, x bits, z bits) terms.
+    """
+    n = cirq.num_qubits(gate)
+    terms = []
+    for probability, unitary in cirq.mixture(gate):
+        for labels in itertools.product('IXYZ', repeat=n):
+            pauli = functools.reduce(np.kron, [_PAULI_MATRICES[label] for label in labels])
+            if cirq.equal_up_to_global_phase(unitary, pauli, atol=1e-8):
+                if set(labels) != {'I'}:
+                    x_bits = tuple(_PAULI_BITS[label][0] for label in labels)
+                    z_bits = tuple(_PAULI_BITS[label][1] for label in labels)
+                    terms.append((probability, x_bits, z_bits))
+                break
+        else:
+            raise ValueError(f"Channel {gate!r} is not a Pauli channel.")
+    return tuple(terms)
+
+
+def is_pauli_channel(gate):
+    """
+    Whether a channel is a mixture of Pauli operators the frame simulator supports.
+    """
+    try:
+        _pauli_mixture(gate)
+    except (TypeError, ValueError):
+        return False
+    return True
+
+
+def is_noise(op):
+    """
+    Whether an operation is a noise channel, i.e. not a measurement, reset or unitary.
+    """
+    return not cirq.is_measurement(op) and not cirq.has_unitary(op) and not isinstance(op.gate, cirq.ResetChannel)
+
+
+class PauliFrameSimulator:
+    """
+    Bit-packed Pauli-frame simulator for Clifford circuits with Pauli noise.
+
+    Each shot is one bit in a 64-bit word, so a frame for ``n`` qubits and ``N``
+    shots is two ``(n, N / 64)`` uint64 arrays. Frames track the difference to
+    a single noiseless reference run from ``cirq.CliffordSimulator``; Clifford
+    gates act on all shots with a few XORs, and measurement outcomes are the
+    reference bits flipped by the frame's X component.
+    """
+
+    def __init__(self, seed=None):
+        self.rng = np.random.default_rng(seed)
+
+    def _random_words(self, size):
+        return self.rng.integers(0, _ALL_ONES, size=size, dtype=np.uint64, endpoint=True)
+
+    def _apply_noise(self, gate, indices, x, z, repetitions):
+        # Sparse sampling: draw how many shots suffer any error, pick them, then
+        # pick one (mutually exclusive) Pauli term per affected shot
+        terms = _pauli_mixture(gate)
+        probabilities = np.array([term[0] for term in terms])
+        total = probabilities.sum()
+        count = self.rng.binomial(repetitions, min(total, 1.0))
+        if not count:
+            return
+        shots = self.rng.choice(repetitions, size=count, replace=False)
+        choices = self.rng.choice(len(terms), size=count, p=probabilities / total)
+        words = shots // WORD_BITS
+        masks = np.uint64(1) << (shots % WORD_BITS).astype(np.uint64)
+
+        for term_index, (_, x_bits, z_bits) in enumerate(terms):
+            selected = choices == term_index
+            errors = np.zeros(x.shape[1], dtype=np.uint64)
+            np.bitwise_or.at(errors, words[selected], masks[selected])
+            for index, x_bit, z_bit in zip(indices, x_bits, z_bits):
+                if x_bit:
+                    x[index] ^= errors
+                if z_bit:
+                    z[index] ^= errors
+
+    def run(self, circuit, repetitions, noise=None):
+        """
+        Sample a noisy Clifford circuit.
+
+        Parameters:
+        - circuit: A cirq.Circuit of Clifford gates, resets, measurements and
+          Pauli channels.
+        - repetitions: Number of shots.
+        - noise: Optional cirq noise model or channel added with ``with_noise``.
+
+        Returns:
+        - measurements: Dictionary of key -> uint8 array of shape (shots, width).
+        """
+        packed = self.run_packed(circuit, repetitions, noise)
+        return {key: unpack_shots(words, repetitions) for key, words in packed.items()}
+
+    def run_packed(self, circuit, repetitions, noise=None):
+        """
+        Like ``run`` but returns key -> uint64 array of shape (width, words).
+        """
+        if noise is not None:
+            circuit = circuit.with_noise(noise)
+        qubits = sorted(circuit.all_qubits())
+        position = {q: i for i, q in enumerate(qubits)}
+        num_words = -(-repetitions // WORD_BITS)
+
+        reference_circuit = cirq.Circuit(op for op in circuit.all_operations() if not is_noise(op))
+        seed = int(self.rng.integers(2 ** 31))
+        reference = cirq.CliffordSimulator(seed=seed).run(reference_circuit, repetitions=1).measurements
+
+        # All qubits start in |0⟩: a random Z frame reproduces later random outcomes
+        x = np.zeros((len(qubits), num_words), dtype=np.uint64)
+        z = self._random_words((len(qubits), num_words))
+        results = {}
+
+        for op in circuit.all_operations():
+            indices = [position[q] for q in op.qubits]
+            if cirq.is_measurement(op):
+                key = cirq.measurement_key_name(op)
+                flips = np.where(reference[key][0].astype(bool)[:, None], _ALL_ONES, np.uint64(0))
+                results[key] = x[indices] ^ flips
+                z[indices] = self._random_words((len(indices), num_words))
+            elif isinstance(op.gate, cirq.ResetChannel):
+                x[indices] = 0
+                z[indices] = self._random_words((len(indices), num_words))
+            elif is_noise(op):
+                self._apply_noise(op.gate, indices, x, z, repetitions)
+            else:
+                xs, zs = _symplectic(op.gate)
+                k = len(indices)
+                old_x, old_z = x[indices], z[indices]
+                new_x = np.zeros_like(old_x)
+                new_z = np.zeros_like(old_z)
+                for i in range(k):
+                    for j in range(k):
+                        if xs[i, j]:
+                            new_x[j] ^= old_x[i]
+                        if xs[k + i, j]:
+                            new_x[j] ^= old_z[i]
+                        if zs[i, j]:
+                            new_z[j] ^= old_x[i]
+                        if zs[k + i, j]:
+                            new_z[j] ^= old_z[i]
+                x[indices], z[indices] = new_x, new_z
+
+        return results
+
+
+def propagate_pauli(operations, pauli):
+    """
+    Push one Pauli error through a sequence of operations.
+
+    This is ``PauliFrameSimulator`` for a single deterministic frame: Clifford
+    gates conjugate it, resets clear it, measurements record its X component
+    and noise channels are skipped.
+
+    Parameters:
+    - operations: The operations following the error, in circuit order.
+    - pauli: Mapping of qubit -> 'X', 'Y' or 'Z'.
+
+    Returns:
+    - flips: Dictionary of measurement key -> tuple of flipped bits.
+    - frame: Dictionary of qubit -> (x bit, z bit) left after the operations.
+    """
+    frame = {qubit: _PAULI_BITS[label] for qubit, label in pauli.items()}
+    flips = {}
+    for op in operations:
+        if cirq.is_measurement(op):
+            flips[cirq.measurement_key_name(op)] = tuple(frame.get(q, (0, 0))[0] for q in op.qubits)
+            # A Z on a freshly measured qubit is only a phase
+            for q in op.qubits:
+                frame[q] = (frame.get(q, (0, 0))[0], 0)
+        elif isinstance(op.gate, cirq.ResetChannel):
+            for q in op.qubits:
+                frame.pop(q, None)
+        elif is_noise(op) or not any(q in frame for q in op.qubits):
+            continue
+        else:
+            xs, zs = _symplectic(op.gate)
+            k = len(op.qubits)
+            old = [frame.pop(q, (0, 0)) for q in op.qubits]
+            new_x, new_z = [0] * k, [0] * k
+            for i, (x_bit, z_bit) in enumerate(old):
+                for j in range(k):
+                    new_x[j] ^= (x_bit & xs[i, j]) ^ (z_bit & xs[k + i, j])
+                    new_z[j] ^= (x_bit & zs[i, j]) ^ (z_bit & zs[k + i, j])
+            for q, x_bit, z_bit in zip(op.qubits, new_x, new_z):
+                if x_bit or z_bit:
+                    frame[q] = (int(x_bit), int(z_bit))
+    frame = {q: bits for q, bits in frame.items() if bits != (0, 0)}
+    return flips, frame
+
+
+def unpack_shots(words, repetitions):
+    """
+    Convert (width, words) uint64 shot words into a (shots, width) uint8 array.
+    """
+    as_bytes = np.ascontiguousarray(words, dtype='<u8').view(np.uint8)
+    bits = np.unpackbits(as_bytes, axis=-1, bitorder='little')
+    return bits[:, :repetitions].T
+
+
+def _validation_circuits():
+    a, b, c = cirq.LineQubit.range(3)
+    return {
+        'bell_depolarized': cirq.Circuit(
+            cirq.H(a), cirq.CNOT(a, b), cirq.depolarize(0.1).on_each(a, b),
+            cirq.measure(a, b, key='m'),
+        ),
+        'mid_circuit_measurement': cirq.Circuit(
+            cirq.H(a), cirq.CNOT(a, b), cirq.phase_flip(0.2)(a), cirq.H(a),
+            cirq.measure(a, key='x'), cirq.reset(a), cirq.bit_flip(0.1)(b),
+            cirq.CNOT(b, a), cirq.measure(a, b, key='z'),
+        ),
+        'asymmetric_ghz': cirq.Circuit(
+            cirq.H(a), cirq.S(a), cirq.asymmetric_depolarize(0.05, 0.1, 0.02)(a),
+            cirq.CNOT(a, b), cirq.CZ(b, c), cirq.H(c), cirq.bit_flip(0.05)(c),
+            cirq.measure(a, b, c, key='m'),
+        ),
+    }
+
+
+def _key_values(measurements, key):
+    bits = np.asarray(measurements[key], dtype=np.int64)
+    return bits @ (1 << np.arange(bits.shape[1] - 1, -1, -1))
+
+
+def validate_against_clifford(circuits=None, repetitions=2000, ft_repetitions=50, seed=0, alpha=1e-4):
+    """
+    Compare ``PauliFrameSimulator`` with ``cirq.CliffordSimulator``.
+
+    For every circuit and measurement key the outcome distributions of both
+    simulators are compared with a chi-square test of homogeneity. The
+    noiseless two-round flagged five-qubit circuit is also sampled, where
+    every shot must repeat its first-round syndromes and raise no flag.
+
+    Parameters:
+    - circuits: Mapping of name -> noisy Clifford circuit with single-qubit
+      Pauli channels (the ones ``cirq.CliffordSimulator`` supports); a few
+      small circuits are used if None.
+    - repetitions: Shots per simulator and circuit.
+    - ft_repetitions: ``cirq.CliffordSimulator`` shots of the flagged
+      five-qubit circuit, which costs it about 0.15 s per shot.
+    - seed: Seed for both simulators.
+    - alpha: Significance level below which a distribution counts as different.
+
+    Returns:
+    - report: Dictionary with 'distributions' (rows with 'circuit', 'key',
+      'p_value' and 'passed'), 'ft_mismatches' and 'passed'.
+    """
+    from scipy import stats
+
+    from fault_tolerant_encoding import FIVE_QUBIT_STABILIZERS, fault_tolerant_encoding_with_flag
+
+    circuits = _validation_circuits() if circuits is None else circuits
+    ft_circuit = fault_tolerant_encoding_with_flag(rounds=2)
+    frame_ft = PauliFrameSimulator(seed).run(ft_circuit, repetitions)
+    cases = [(name, circuit, repetitions) for name, circuit in circuits.items()]
+    cases.append(('flagged_five_qubit', ft_circuit, ft_repetitions))
+
+    rows = []
+    for name, circuit, shots in cases:
+        frame = frame_ft if circuit is ft_circuit else PauliFrameSimulator(seed).run(circuit, repetitions)
+        reference = cirq.CliffordSimulator(seed=seed).run(circuit, repetitions=shots).measurements
+        for key in sorted(reference):
+            expected, observed = _key_values(reference, key), _key_values(frame, key)
+            values = np.union1d(expected, observed)
+            table = np.array([[np.sum(expected == v) for v in values], [np.sum(observed == v) for v in values]])
+            p_value = stats.chi2_contingency(table)[1] if len(values) > 1 else 1.0
+            rows.append({'circuit': name, 'key': key, 'p_value': float(p_value), 'passed': p_value >= alpha})
+
+    # Without noise the second round must reproduce the first and no flag may fire
+    bad = np.zeros(repetitions, dtype=bool)
+    for i in range(len(FIVE_QUBIT_STABILIZERS)):
+        bad |= frame_ft[f'syndrome_0_{i}'][:, 0] != frame_ft[f'syndrome_1_{i}'][:, 0]
+        for r in range(2):
+            bad |= frame_ft[f'flag_{r}_{i}'][:, 0] != 0
+    ft_mismatches = int(bad.sum())
+
+    return {
+        'distributions': rows,
+        'ft_mismatches': ft_mismatches,
+        'passed': ft_mismatches == 0 and all(row['passed'] for row in rows),
+    }
+
+
+if __name__ == "__main__":
+    report = validate_against_clifford()
+    for row in report['distributions']:
+        print(f"{row['circuit']:<26} {row['key']:<14} p = {row['p_value']:.3f}  {'ok' if row['passed'] else 'MISMATCH'}")
+    print(f"Flagged five-qubit circuit mismatches: {report['ft_mismatches']}")
+    print("PASSED" if report['passed'] else "FAILED")
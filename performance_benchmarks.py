@@ -0,0 +1,307 @@
+import argparse
+import contextlib
+import io
+import json
+import platform
+import sys
+import time
+import tracemalloc
+
+import cirq
+import numpy as np
+
+from enhanced_noise_model import AdvancedNoiseModel
+from main import cdd_sequence, cpmg_sequence, measure_t1_t2, simulate_sequence
+from simulation import simulate_without_noise
+
+DEFAULT_BASELINE = 'benchmark_baseline.json'
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 7
+# Slowdowns under 10 ms are scheduler noise, not regressions
+MIN_TIME_DELTA_S = 10e-3
+# A case may slow down by this many baseline spreads before it counts
+SPREAD_FACTOR = 3
+
+
+def _quiet(func):
+    # Several entry points print progress on every step
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            return func()
+    return run
+
+
+def _noise_profile():
+    return {'low_frequency_noise': 0.03, 'high_frequency_noise': 0.02, 'correlated_noise': 0.01}
+
+
+def _t1_t2_case(delays):
+    qubit = cirq.NamedQubit('q')
+    simulator = cirq.DensityMatrixSimulator(seed=0)
+    delays_ns = np.linspace(0, 100, delays)
+    # Both sweeps resolve a 2- and a 4-operation circuit per delay
+    return lambda: measure_t1_t2(qubit, simulator, delays_ns=delays_ns, repetitions=1000), 6 * delays
+
+
+def _sequence_pulses_case(num_pulses):
+    qubit = cirq.NamedQubit('q')
+    simulator = cirq.DensityMatrixSimulator(seed=0)
+    profile = _noise_profile()
+    operations = len(list(cpmg_sequence(qubit, 100, num_pulses).all_operations())) + 4
+    return lambda: simulate_sequence(qubit, simulator, cpmg_sequence, profile, num_cycles=10,
+                                     repetitions=100, num_pulses=num_pulses), operations
+
+
+def _sequence_repetitions_case(repetitions):
+    qubit = cirq.NamedQubit('q')
+    simulator = cirq.DensityMatrixSimulator(seed=0)
+    profile = _noise_profile()
+    return lambda: simulate_sequence(qubit, simulator, cpmg_sequence, profile, num_cycles=10,
+                                     repetitions=repetitions // 10, num_pulses=4), repetitions
+
+
+def _cdd_levels_case(level):
+    qubit = cirq.NamedQubit('q')
+    operations = len(list(cdd_sequence(qubit, 100, level).all_operations()))
+    return lambda: cdd_sequence(qubit, 100, level), operations
+
+
+def _noise_model_qubits_case(num_qubits):
+    qubits = cirq.LineQubit.range(num_qubits)
+    circuit = cirq.Circuit()
+    for _ in range(5):
+        circuit.append(cirq.H.on_each(*qubits))
+        circuit.append(cirq.CNOT(a, b) for a, b in zip(qubits, qubits[1:]))
+    circuit.append(cirq.measure(*qubits, key='result'))
+    noise = AdvancedNoiseModel(0.01, 0.01, 0.01, correlated_strength=0.005)
+    simulator = cirq.DensityMatrixSimulator(noise=noise, seed=0)
+    operations = len(list(circuit.with_noise(noise).all_operations()))
+    return lambda: simulator.run(circuit, repetitions=100), operations
+
+
+def _without_noise_steps_case(time_steps):
+    qubit = cirq.NamedQubit('q')
+    simulator = cirq.Simulator(seed=0)
+    sequence = cpmg_sequence(qubit, 100, 4)
+    # Feedback appends one gate per step, so total work grows with the square of the steps
+    operations = sum(len(sequence) + 2 + step for step in range(time_steps))
+    return _quiet(lambda: simulate_without_noise(qubit, simulator, sequence, time_steps=time_steps,
+                                                 repetitions=100)), operations
+
+
+# name -> (swept parameter, sizes, quick sizes, case factory)
+BENCHMARKS = {
+    'measure_t1_t2': ('delays', (11, 21, 41, 81), (11, 21), _t1_t2_case),
+    'simulate_sequence[pulses]': ('pulses', (2, 4, 8, 16), (2, 4), _sequence_pulses_case),
+    'simulate_sequence[repetitions]': ('repetitions', (1000, 10000, 100000), (1000, 10000),
+                                       _sequence_repetitions_case),
+    'cdd_sequence': ('level', (2, 4, 6, 8, 10), (2, 4, 6), _cdd_levels_case),
+    'AdvancedNoiseModel': ('qubits', (1, 2, 4, 6, 8), (1, 2, 4), _noise_model_qubits_case),
+    'simulate_without_noise': ('time_steps', (5, 10, 20, 40), (5, 10), _without_noise_steps_case),
+}
+
+
+def measure(func, repeat=DEFAULT_REPEAT):
+    """
+    Median and interquartile range of ``repeat`` wall times, and peak traced
+    memory of ``func()``.
+
+    Memory is measured in a separate call because tracemalloc slows Python down.
+    """
+    func()  # warm caches and imports
+    walls = [_timed(func) for _ in range(repeat)]
+    low, wall, high = np.percentile(walls, [25, 50, 75])
+    tracemalloc.start()
+    try:
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return float(wall), float(high - low), peak
+
+
+def _timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def run_benchmarks(names=None, quick=False, repeat=DEFAULT_REPEAT):
+    """
+    Run the benchmark cases over their size grids.
+
+    Returns:
+    - report: Dictionary with 'metadata' and a 'results' list of dictionaries
+      with 'name', 'parameter', 'size', 'wall_s' (median), 'wall_spread_s'
+      (interquartile range), 'peak_bytes', 'operations' and 'ops_per_s'.
+    """
+    results = []
+    for name in names or BENCHMARKS:
+        parameter, sizes, quick_sizes, factory = BENCHMARKS[name]
+        for size in quick_sizes if quick else sizes:
+            results.append(run_case(name, size, repeat))
+    return {'metadata': _metadata(), 'results': results}
+
+
+def run_case(name, size, repeat=DEFAULT_REPEAT):
+    """
+    Measure one benchmark case and return its result dictionary.
+    """
+    parameter, _, _, factory = BENCHMARKS[name]
+    func, operations = factory(size)
+    wall, spread, peak = measure(func, repeat)
+    return {
+        'name': name,
+        'parameter': parameter,
+        'size': size,
+        'wall_s': wall,
+        'wall_spread_s': spread,
+        'peak_bytes': peak,
+        'operations': operations,
+        'ops_per_s': operations / wall if wall > 0 else float('inf'),
+    }
+
+
+def _metadata():
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cirq': cirq.__version__,
+        'numpy': np.__version__,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare_to_baseline(report, baseline, tolerance=DEFAULT_TOLERANCE, min_time_delta_s=MIN_TIME_DELTA_S):
+    """
+    Compare wall times and peak memory against a baseline report.
+
+    A case regresses if either metric exceeds ``(1 + tolerance)`` times its
+    baseline value. For wall time the tolerance is widened to
+    ``SPREAD_FACTOR`` times the baseline's relative spread for noisy cases,
+    and a slowdown must also exceed ``min_time_delta_s`` in absolute terms.
+    Cases missing from the baseline are skipped.
+
+    Returns:
+    - rows: List of dictionaries with 'name', 'size', 'time_ratio',
+      'memory_ratio' and 'regressed'.
+    """
+    reference = {(r['name'], r['size']): r for r in baseline['results']}
+    rows = []
+    for result in report['results']:
+        base = reference.get((result['name'], result['size']))
+        if base is None:
+            continue
+        time_ratio = result['wall_s'] / base['wall_s']
+        time_tolerance = max(tolerance, SPREAD_FACTOR * base.get('wall_spread_s', 0.0) / base['wall_s'])
+        memory_ratio = result['peak_bytes'] / max(base['peak_bytes'], 1)
+        rows.append({
+            'name': result['name'],
+            'size': result['size'],
+            'time_ratio': time_ratio,
+            'memory_ratio': memory_ratio,
+            'regressed': ((time_ratio > 1 + time_tolerance and result['wall_s'] - base['wall_s'] > min_time_delta_s)
+                          or memory_ratio > 1 + tolerance),
+        })
+    return rows
+
+
+def scaling_exponents(report):
+    """
+    Fit ``wall_s ~ operations ** k`` for every benchmark.
+
+    Work counts already include the expected growth (e.g. 2**level pulses for
+    CDD), so k close to 1 means linear cost per operation and k near 2 flags a
+    quadratic loop.
+
+    Returns:
+    - exponents: Mapping of benchmark name -> fitted k (NaN for fewer than two sizes).
+    """
+    exponents = {}
+    for name in dict.fromkeys(r['name'] for r in report['results']):
+        rows = [r for r in report['results'] if r['name'] == name]
+        if len(rows) < 2:
+            exponents[name] = float('nan')
+            continue
+        x = np.log([r['operations'] for r in rows])
+        y = np.log([r['wall_s'] for r in rows])
+        exponents[name] = float(np.polyfit(x, y, 1)[0])
+    return exponents
+
+
+def print_report(report):
+    print(f"{'benchmark':<32} {'param':>12} {'size':>8} {'wall (ms)':>10} {'peak (KiB)':>11} {'ops/s':>12}")
+    for r in report['results']:
+        print(f"{r['name']:<32} {r['parameter']:>12} {r['size']:>8} {r['wall_s'] * 1e3:>10.2f} "
+              f"{r['peak_bytes'] / 1024:>11.1f} {r['ops_per_s']:>12.0f}")
+
+
+def print_scaling_report(report, width=40):
+    """
+    Print each benchmark's wall time against size as a log-scaled bar chart,
+    with its fitted scaling exponent.
+    """
+    exponents = scaling_exponents(report)
+    for name, exponent in exponents.items():
+        rows = [r for r in report['results'] if r['name'] == name]
+        print(f"\n{name}: wall time ~ operations^{exponent:.2f}")
+        walls = np.array([r['wall_s'] for r in rows])
+        low, high = np.log(walls.min()), np.log(walls.max())
+        for r, wall in zip(rows, walls):
+            fraction = (np.log(wall) - low) / (high - low) if high > low else 1.0
+            bar = '#' * max(1, int(round(fraction * width)))
+            print(f"  {r['parameter']}={r['size']:<8} {wall * 1e3:>10.2f} ms  {bar}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Offline speed benchmarks for the simulation entry points.')
+    parser.add_argument('--benchmark', action='append', choices=sorted(BENCHMARKS),
+                        help='Benchmark to run (repeatable; default: all).')
+    parser.add_argument('--quick', action='store_true', help='Run only the smallest sizes.')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT,
+                        help='Timed runs per case; the median is kept.')
+    parser.add_argument('--output', help='Write the JSON report to this file.')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline JSON report to compare against.')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative slowdown before a case counts as a regression.')
+    parser.add_argument('--update-baseline', action='store_true', help='Overwrite the baseline with this run.')
+    parser.add_argument('--scaling', action='store_true', help='Print complexity curves and exponents.')
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.benchmark, quick=args.quick, repeat=args.repeat)
+    print_report(report)
+    if args.scaling:
+        print_scaling_report(report)
+    if args.output:
+        with open(args.output, 'w') as handle:
+            json.dump(report, handle, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, 'w') as handle:
+            json.dump(report, handle, indent=2)
+        return 0
+
+    try:
+        with open(args.baseline) as handle:
+            baseline = json.load(handle)
+    except FileNotFoundError:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to create one.")
+        return 0
+
+    rows = compare_to_baseline(report, baseline, args.tolerance)
+    # A slowdown only counts if it shows up again when the case is re-measured
+    retry = {(row['name'], row['size']) for row in rows if row['regressed']}
+    if retry:
+        report['results'] = [min(result, run_case(result['name'], result['size'], args.repeat),
+                                 key=lambda r: r['wall_s'])
+                             if (result['name'], result['size']) in retry else result
+                             for result in report['results']]
+        rows = compare_to_baseline(report, baseline, args.tolerance)
+    print(f"\n{'benchmark':<32} {'size':>8} {'time x':>8} {'memory x':>9}")
+    for row in rows:
+        flag = '  REGRESSION' if row['regressed'] else ''
+        print(f"{row['name']:<32} {row['size']:>8} {row['time_ratio']:>8.2f} {row['memory_ratio']:>9.2f}{flag}")
+    return 1 if any(row['regressed'] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,37 +1,46 @@
-import matplotlib.pyplot as plt
 import numpy as np
-import pandas as pd
 import cirq
 
-def plot_results_cirq(results, labels, time_steps):
+def cycle_probabilities(data, time_steps):
+    """
+    Probability of |0> in consecutive chunks of ``time_steps`` shots.
+
+    Full chunks are averaged with one reshape; a trailing partial chunk gets
+    its own entry, as in the original chunk loop.
+    """
+    data = np.asarray(data).reshape(-1)
+    full = len(data) // time_steps * time_steps
+    probabilities = np.mean(data[:full].reshape(-1, time_steps) == 0, axis=1)
+    if full < len(data):
+        probabilities = np.append(probabilities, np.mean(data[full:] == 0))
+    return probabilities
+
+def plot_results_cirq(results, labels, time_steps, output_path='graphs/qubit_fidelity_plot.png', show=True):
+    # matplotlib is only imported when a plot is actually requested
+    import matplotlib.pyplot as plt
+
     plt.figure(figsize=(10, 6))
-    
+
     for result, label in zip(results, labels):
         if isinstance(result, cirq.ResultDict):
             data = result.measurements['result']
-        elif isinstance(result.data['result'], pd.Series):
-            data = result.data['result'].values
         else:
-            data = result.data['result']
-        
-        prob_0 = []
-        for i in range(0, len(data), time_steps):
-            chunk = data[i:i+time_steps]
-            count_0 = np.sum(chunk == 0)
-            if len(chunk) > 0:
-                prob_0.append(count_0 / len(chunk))
-            else:
-                prob_0.append(0)  # Handle empty chunks to avoid division by zero
-        
-        plt.plot(range(len(prob_0)), prob_0, label=label)
-    
+            data = np.asarray(result.data['result'])  # also unwraps a pandas Series
+
+        prob_0 = cycle_probabilities(data, time_steps)
+        plt.plot(np.arange(len(prob_0)), prob_0, label=label)
+
     plt.xlabel('Measurement Cycle')
     plt.ylabel('Probability of |0>')
     plt.title('Qubit Fidelity During Measurement')
     plt.legend()
     plt.grid(True)
-    plt.savefig('graphs/qubit_fidelity_plot.png')
-    plt.show()
+    if output_path:
+        plt.savefig(output_path)
+    if show:
+        plt.show()
+    else:
+        plt.close()
 
 def print_result_info(result):
     print(f"Result type: {type(result)}")
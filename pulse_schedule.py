@@ -0,0 +1,101 @@
+import cirq
+import numpy as np
+
+# Pulse axes are stored as small integers indexing into this table
+AXIS_GATES = (cirq.X, cirq.Y, cirq.Z)
+AXIS_X, AXIS_Y, AXIS_Z = range(3)
+
+
+class PulseSchedule:
+    """
+    Array-backed description of a dynamical decoupling sequence.
+
+    Pulses are instantaneous and stored as sorted times (in ns) with an axis
+    code per pulse. Analytic code can work on the arrays directly; a
+    ``cirq.Circuit`` is only built when ``to_circuit`` is called.
+    """
+
+    __slots__ = ('times', 'axes', 'total_duration', '_circuits')
+
+    def __init__(self, times, axes, total_duration):
+        self.times = np.asarray(times, dtype=float)
+        self.axes = np.broadcast_to(np.asarray(axes, dtype=np.uint8), self.times.shape).copy()
+        self.total_duration = float(total_duration)
+        self._circuits = {}
+
+        if self.times.ndim != 1:
+            raise ValueError("Pulse times must be a one-dimensional array.")
+        if np.any(np.diff(self.times) < 0):
+            raise ValueError("Pulse times must be sorted.")
+        if self.times.size and (self.times[0] < 0 or self.times[-1] > self.total_duration):
+            raise ValueError("Pulse times must lie within [0, total_duration].")
+
+    def __len__(self):
+        return self.times.size
+
+    def __repr__(self):
+        return (f"PulseSchedule(num_pulses={len(self)}, "
+                f"total_duration={self.total_duration:g})")
+
+    def intervals(self):
+        """Free-evolution times before each pulse and after the last one."""
+        return np.diff(self.times, prepend=0.0, append=self.total_duration)
+
+    def to_circuit(self, qubit):
+        """
+        Materialize the schedule as a cirq.Circuit of waits and pulses.
+
+        The circuit is built on first use and cached per qubit as a
+        ``cirq.FrozenCircuit``; every call returns a fresh mutable copy, so
+        callers may append to it without touching the cache.
+        """
+        circuit = self._circuits.get(qubit)
+        if circuit is None:
+            operations = []
+            intervals = self.intervals()
+            for interval, axis in zip(intervals[:-1], self.axes):
+                if interval > 0:
+                    operations.append(cirq.WaitGate(cirq.Duration(nanos=interval)).on(qubit))
+                operations.append(AXIS_GATES[axis](qubit))
+            if intervals[-1] > 0:
+                operations.append(cirq.WaitGate(cirq.Duration(nanos=intervals[-1])).on(qubit))
+            circuit = cirq.FrozenCircuit.from_moments(*operations)
+            self._circuits[qubit] = circuit
+        return circuit.unfreeze()
+
+
+def udd_schedule(num_pulses, total_duration, axis=AXIS_X):
+    """
+    Uhrig schedule with pulses at T * sin^2(pi * j / (2n + 2)), j = 1..n.
+    """
+    j = np.arange(1, num_pulses + 1)
+    times = total_duration * np.sin(np.pi * j / (2 * num_pulses + 2)) ** 2
+    return PulseSchedule(times, axis, total_duration)
+
+
+def cpmg_schedule(num_pulses, total_duration, axis=AXIS_X):
+    """
+    CPMG schedule with equally spaced pulses at T * (j - 1/2) / n, j = 1..n.
+    """
+    j = np.arange(1, num_pulses + 1)
+    times = total_duration * (j - 0.5) / num_pulses
+    return PulseSchedule(times, axis, total_duration)
+
+
+def cdd_schedule(level, total_duration, axis=AXIS_X):
+    """
+    Concatenated schedule C_l = C_{l-1} X C_{l-1} X with C_0 free evolution.
+
+    C_l splits the duration into 2^l equal segments. The boundary after
+    segment k receives one pulse from every concatenation level m < l with
+    2^m dividing k, and coinciding pulses cancel, so a pulse survives exactly
+    where that count is odd.
+    """
+    if level < 1:
+        return PulseSchedule([], axis, total_duration)
+    k = np.arange(1, 2 ** level + 1)
+    two_adic = np.log2(k & -k).astype(int)
+    pulse_counts = np.minimum(two_adic, level - 1) + 1
+    boundaries = k[pulse_counts % 2 == 1]
+    times = total_duration * boundaries / 2 ** level
+    return PulseSchedule(times, axis, total_duration)
@@ -1,57 +1,349 @@
-import cirq
-import numpy as np
+import warnings
 
 import cirq
 import numpy as np
+import sympy
+from scipy import optimize, stats
+
+from result_cache import cache_key, noise_fingerprint
+
+DELAY_SYMBOL = sympy.Symbol('delay_ns')
+
 
-def measure_t1_t2(qubit, simulator, repetitions=1000, delay_ns=10):
+def t1_circuit(qubit, delay=DELAY_SYMBOL):
     """
-    Measures T1 (relaxation time) and T2 (dephasing time) for a given qubit.
+    Inversion-recovery circuit: excite, wait, measure.
     """
-    # T1 measurement: Energy relaxation time
-    circuit_t1 = cirq.Circuit()
-    circuit_t1.append(cirq.X(qubit))
-    circuit_t1.append(cirq.WaitGate(cirq.Duration(nanos=delay_ns)).on(qubit))
-    circuit_t1.append(cirq.measure(qubit, key='result'))
+    return cirq.Circuit(
+        cirq.X(qubit),
+        cirq.WaitGate(cirq.Duration(nanos=delay)).on(qubit),
+        cirq.measure(qubit, key='result'),
+    )
 
-    result_t1 = simulator.run(circuit_t1, repetitions=repetitions)
-    measured_results_t1 = result_t1.histogram(key='result')
-    prob_0_t1 = measured_results_t1.get(0, 0) / sum(measured_results_t1.values())
 
-    # Calculate T1 with error handling
-    if 0 < prob_0_t1 < 1:
-        t1 = -delay_ns / np.log(1 - prob_0_t1)
-    else:
-        t1 = delay_ns * 10  # Set to 10 times the delay as a fallback
-
-    # T2 measurement: Phase decoherence time
-    circuit_t2 = cirq.Circuit()
-    circuit_t2.append(cirq.H(qubit))
-    circuit_t2.append(cirq.WaitGate(cirq.Duration(nanos=delay_ns)).on(qubit))
-    circuit_t2.append(cirq.H(qubit))
-    circuit_t2.append(cirq.measure(qubit, key='result'))
-
-    result_t2 = simulator.run(circuit_t2, repetitions=repetitions)
-    measured_results_t2 = result_t2.histogram(key='result')
-    prob_0_t2 = measured_results_t2.get(0, 0) / sum(measured_results_t2.values())
-
-    # Calculate T2 with error handling
-    log_input = abs(2 * prob_0_t2 - 1)
-    if 0 < log_input < 1:
-        t2 = -2 * delay_ns / np.log(log_input)
+def t2_circuit(qubit, delay=DELAY_SYMBOL):
+    """
+    Hahn-echo circuit with the refocusing pulse in the middle of the delay.
+    """
+    return cirq.Circuit(
+        cirq.H(qubit),
+        cirq.WaitGate(cirq.Duration(nanos=delay / 2)).on(qubit),
+        cirq.X(qubit),
+        cirq.WaitGate(cirq.Duration(nanos=delay / 2)).on(qubit),
+        cirq.H(qubit),
+        cirq.measure(qubit, key='result'),
+    )
+
+
+def _density_matrix_simulator(simulator):
+    # Keep the caller's noise model but evaluate final density matrices exactly
+    if isinstance(simulator, cirq.DensityMatrixSimulator):
+        return simulator
+    return cirq.DensityMatrixSimulator(noise=getattr(simulator, 'noise', None))
+
+
+def _sweep_probabilities(circuit, delays_ns, simulator, outcome):
+    qubit, = circuit.all_qubits()
+    sweep = cirq.Points(DELAY_SYMBOL.name, [float(d) for d in delays_ns])
+    program = circuit[:-1]  # drop the measurement, read populations directly
+    results = simulator.simulate_sweep(program, params=sweep, qubit_order=[qubit])
+    return np.array([np.real(r.final_density_matrix[outcome, outcome]) for r in results])
+
+
+def fit_exponential_decay(delays_ns, values, confidence=0.95):
+    """
+    Fit ``amplitude * exp(-delay / tau) + offset`` and return tau with its interval.
+
+    The fit is done on the decay rate so that a flat curve maps cleanly to an
+    infinite time constant instead of a failed fit. A decay is only reported
+    when it is significant: the amplitude must differ from zero, the rate
+    interval must exclude zero at the requested confidence and the time
+    constant must be longer than the delay spacing. Otherwise, e.g. for shot
+    noise on a flat curve, there is no measurable decay.
+
+    Returns:
+    - tau: The fitted time constant in ns (``np.inf`` if no decay is measurable).
+    - interval: ``(low, high)`` confidence interval for tau.
+    """
+    delays_ns = np.asarray(delays_ns, dtype=float)
+    values = np.asarray(values, dtype=float)
+    if np.ptp(values) < 1e-9:
+        return np.inf, (np.inf, np.inf)
+
+    def model(t, amplitude, rate, offset):
+        return amplitude * np.exp(-rate * t) + offset
+
+    span = np.ptp(delays_ns) or 1.0
+    initial = (values[0] - values[-1], 1.0 / span, values[-1])
+    try:
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', optimize.OptimizeWarning)
+            params, covariance = optimize.curve_fit(
+                model, delays_ns, values, p0=initial,
+                bounds=([-np.inf, 0.0, -np.inf], [np.inf, np.inf, np.inf]),
+            )
+    except RuntimeError:
+        # No convergence: the data do not pin down an exponential
+        return np.inf, (np.inf, np.inf)
+
+    amplitude, rate = params[0], params[1]
+    errors = np.sqrt(np.diag(covariance))
+    if not np.all(np.isfinite(errors)):
+        return np.inf, (np.inf, np.inf)
+    amplitude_error, rate_error = errors[0], errors[1]
+    z = stats.norm.ppf(0.5 + confidence / 2)
+    low_rate, high_rate = rate - z * rate_error, rate + z * rate_error
+    if abs(amplitude) <= z * amplitude_error or low_rate <= 0:
+        return np.inf, (np.inf, np.inf)
+    # A decay faster than the delay spacing rests on a single point (typically
+    # a shot-noise outlier at the first delay) and is not resolved by the sweep
+    steps = np.diff(np.unique(delays_ns))
+    if len(steps) and 1.0 / rate < steps.min():
+        return np.inf, (np.inf, np.inf)
+
+    return 1.0 / rate, (1.0 / high_rate, 1.0 / low_rate)
+
+
+def measure_t1_t2_sweep(qubit, simulator=None, delays_ns=None, repetitions=None,
+                        seed=None, confidence=0.95, cache=None):
+    """
+    Measures T1 and T2 over a whole array of delays and fits exponential decays.
+
+    Both experiments are single parameterized circuits resolved over the delay
+    sweep, and evaluated with a density-matrix simulator so each delay costs one
+    short simulation. Populations are exact unless ``repetitions`` is given, in
+    which case binomial shot noise is drawn from them.
+
+    Parameters:
+    - qubit: The qubit to characterize.
+    - simulator: Simulator whose noise model is used (a noiseless one if None).
+    - delays_ns: Array of delays in ns (defaults to 21 points between 0 and 100).
+    - repetitions: Optional number of shots per delay.
+    - seed: Seed for the shot-noise generator.
+    - confidence: Confidence level of the returned intervals.
+    - cache: Optional ``ResultCache`` holding the measured curves across runs;
+      unused when shot noise is drawn without a ``seed``.
+
+    Returns:
+    - result: Dictionary with 't1', 't2', 't1_ci', 't2_ci', 'delays_ns' and the
+      measured curves 'p1_t1' and 'p0_t2'.
+    """
+    if delays_ns is None:
+        delays_ns = np.linspace(0, 100, 21)
+    delays_ns = np.asarray(delays_ns, dtype=float)
+    simulator = _density_matrix_simulator(simulator)
+
+    def measure_curves():
+        p1_t1 = _sweep_probabilities(t1_circuit(qubit), delays_ns, simulator, outcome=1)
+        p0_t2 = _sweep_probabilities(t2_circuit(qubit), delays_ns, simulator, outcome=0)
+        if repetitions is not None:
+            rng = np.random.default_rng(seed)
+            p1_t1 = rng.binomial(repetitions, np.clip(p1_t1, 0, 1)) / repetitions
+            p0_t2 = rng.binomial(repetitions, np.clip(p0_t2, 0, 1)) / repetitions
+        return {'p1_t1': p1_t1, 'p0_t2': p0_t2}
+
+    # Unseeded shot noise is fresh on every call and must not be replayed
+    if cache is None or (repetitions is not None and seed is None):
+        curves = measure_curves()
     else:
-        t2 = delay_ns * 5  # Set to 5 times the delay as a fallback
-    
-    return t1, t2
+        key = cache_key(t1_circuit(qubit), t2_circuit(qubit), delays_ns=delays_ns,
+                        noise=noise_fingerprint(simulator.noise), repetitions=repetitions, seed=seed)
+        curves = cache.cached(key, measure_curves)
+    p1_t1, p0_t2 = np.asarray(curves['p1_t1']), np.asarray(curves['p0_t2'])
+
+    t1, t1_ci = fit_exponential_decay(delays_ns, p1_t1, confidence)
+    t2, t2_ci = fit_exponential_decay(delays_ns, p0_t2, confidence)
+
+    return {
+        't1': t1,
+        't2': t2,
+        't1_ci': t1_ci,
+        't2_ci': t2_ci,
+        'delays_ns': delays_ns,
+        'p1_t1': p1_t1,
+        'p0_t2': p0_t2,
+    }
+
+
+def measure_t1_t2(qubit, simulator, repetitions=1000, delays_ns=None, seed=None, cache=None):
+    """
+    Measures T1 (relaxation time) and T2 (dephasing time) for a given qubit.
+    """
+    result = measure_t1_t2_sweep(qubit, simulator, delays_ns=delays_ns, repetitions=repetitions,
+                                 seed=seed, cache=cache)
+    return result['t1'], result['t2']
+
+
+def register_circuit(qubits, experiment):
+    """
+    Place one copy of a single-qubit experiment per qubit side by side.
+
+    ``experiment(qubit)`` must return circuits with the same number of moments
+    for every qubit; moment ``i`` of the result holds moment ``i`` of each copy.
+    Measurement keys are suffixed with the qubit so they stay distinct.
+    """
+    copies = [
+        [
+            [cirq.measure(*op.qubits, key=f'result_{qubit}') if cirq.is_measurement(op) else op for op in moment]
+            for moment in experiment(qubit)
+        ]
+        for qubit in qubits
+    ]
+    return cirq.Circuit(
+        cirq.Moment(op for copy in copies for op in copy[i])
+        for i in range(len(copies[0]))
+    )
+
+
+def _is_separable(circuit, delays_ns, simulator):
+    """
+    False if the noise model inserts multi-qubit operations into the register
+    experiment at any delay.
+    """
+    for delay in delays_ns:
+        resolved = cirq.resolve_parameters(circuit[:-1], {DELAY_SYMBOL.name: float(delay)})
+        if any(cirq.num_qubits(op) != 1 for op in resolved.with_noise(simulator.noise).all_operations()):
+            return False
+    return True
+
+
+def _register_probabilities(circuit, qubits, delays_ns, simulator, outcome):
+    # With split_untangled_states every qubit keeps its own 2x2 density matrix
+    sweep = cirq.Points(DELAY_SYMBOL.name, [float(d) for d in delays_ns])
+    program = circuit[:-1]
+    results = simulator.simulate_sweep(program, params=sweep, qubit_order=list(qubits))
+    probabilities = np.empty((len(qubits), len(delays_ns)))
+    for j, result in enumerate(results):
+        for i, qubit in enumerate(qubits):
+            state = result.get_state_containing_qubit(qubit)
+            rho = cirq.partial_trace(
+                state.target_tensor.reshape((2, 2) * len(state.qubits)), [state.qubits.index(qubit)]
+            )
+            probabilities[i, j] = np.real(rho[outcome, outcome])
+    return probabilities
+
+
+def _parallel_probabilities(experiment, qubits, delays_ns, simulator, outcome):
+    """
+    Populations of one experiment run side by side on all qubits, or None if
+    the noise model entangles them.
+    """
+    register = register_circuit(qubits, experiment)
+    if not _is_separable(register, delays_ns, simulator):
+        return None
+    # The whole register is simulated in its own qubit order: noise models
+    # such as AdvancedNoiseModel assign per-qubit strengths by position
+    return _register_probabilities(register, qubits, delays_ns, simulator, outcome)
+
+
+PROFILE_DTYPE = np.dtype([
+    ('qubit', 'U32'),
+    ('t1', 'f8'), ('t1_low', 'f8'), ('t1_high', 'f8'),
+    ('t2', 'f8'), ('t2_low', 'f8'), ('t2_high', 'f8'),
+    ('low_frequency_noise', 'f8'),
+    ('high_frequency_noise', 'f8'),
+    ('correlated_noise', 'f8'),
+    ('parallel', '?'),
+])
 
-def characterize_noise(qubit, simulator, repetitions=1000):
+
+def noise_profile_from_times(t1, t2, total_duration=100):
     """
-    Characterizes the noise profile of a given qubit using randomized benchmarking.
+    Convert T1 and T2 into the noise-profile dictionary used across the repo.
+
+    Values are error probabilities over ``total_duration``: relaxation
+    ``1 - exp(-T / T1)`` as high-frequency noise and pure dephasing
+    ``1 - exp(-T / Tφ)`` with ``1 / Tφ = 1 / T2 - 1 / (2 T1)`` as
+    low-frequency noise, clipped to [0, 1] so they can be passed straight to
+    ``apply_realistic_noise``. Independent single-qubit experiments cannot see
+    cross-qubit correlations, so the correlated component is reported as 0.
     """
-    noise_profile = {
-        "low_frequency_noise": np.random.uniform(0, 0.1), 
-        "high_frequency_noise": np.random.uniform(0, 0.2),
-        "correlated_noise": np.random.uniform(0, 0.05)
+    dephasing_rate = max(1.0 / t2 - 0.5 / t1, 0.0)
+    return {
+        'low_frequency_noise': float(np.clip(-np.expm1(-total_duration * dephasing_rate), 0.0, 1.0)),
+        'high_frequency_noise': float(np.clip(-np.expm1(-total_duration / t1), 0.0, 1.0)),
+        'correlated_noise': 0.0,
     }
 
-    return noise_profile
+
+def characterize_register(qubits, simulator=None, delays_ns=None, repetitions=None, seed=None,
+                          confidence=0.95, total_duration=100, cache=None):
+    """
+    Characterize every qubit of a register in parallel.
+
+    The T1 and T2 experiments of all qubits run side by side in the same
+    moments, so each experiment type is a single delay sweep, and Cirq keeps
+    unentangled qubits in separate density matrices. If the noise model couples
+    qubits, each qubit is characterized on its own with
+    ``measure_t1_t2_sweep`` instead.
+
+    Parameters:
+    - qubits: The qubits to characterize, e.g. GridQubits from ``create_qubit_cirq``.
+    - simulator: Simulator whose noise model is used (a noiseless one if None).
+    - delays_ns: Array of delays in ns (defaults to 21 points between 0 and 100).
+    - repetitions: Optional number of shots per delay and qubit.
+    - seed: Seed for the shot-noise generator.
+    - confidence: Confidence level of the fitted intervals.
+    - total_duration: Duration in ns the noise-profile probabilities refer to.
+    - cache: Optional ``ResultCache`` holding the measured curves across runs;
+      unused when shot noise is drawn without a ``seed``.
+
+    Returns:
+    - profiles: Structured array with one ``PROFILE_DTYPE`` row per qubit.
+    """
+    qubits = list(qubits)
+    if delays_ns is None:
+        delays_ns = np.linspace(0, 100, 21)
+    delays_ns = np.asarray(delays_ns, dtype=float)
+    simulator = _density_matrix_simulator(simulator)
+
+    def measure_curves():
+        p1_t1 = _parallel_probabilities(t1_circuit, qubits, delays_ns, simulator, outcome=1)
+        p0_t2 = _parallel_probabilities(t2_circuit, qubits, delays_ns, simulator, outcome=0)
+        if p1_t1 is None or p0_t2 is None:
+            return {}
+        if repetitions is not None:
+            rng = np.random.default_rng(seed)
+            p1_t1 = rng.binomial(repetitions, np.clip(p1_t1, 0, 1)) / repetitions
+            p0_t2 = rng.binomial(repetitions, np.clip(p0_t2, 0, 1)) / repetitions
+        return {'p1_t1': p1_t1, 'p0_t2': p0_t2}
+
+    if cache is None or (repetitions is not None and seed is None):
+        curves = measure_curves()
+    else:
+        key = cache_key(register_circuit(qubits, t1_circuit), register_circuit(qubits, t2_circuit),
+                        delays_ns=delays_ns, noise=noise_fingerprint(simulator.noise),
+                        repetitions=repetitions, seed=seed)
+        curves = cache.cached(key, measure_curves)
+
+    profiles = np.zeros(len(qubits), dtype=PROFILE_DTYPE)
+    if not curves:
+        for row, qubit in zip(profiles, qubits):
+            result = measure_t1_t2_sweep(qubit, simulator, delays_ns=delays_ns, repetitions=repetitions,
+                                         seed=seed, confidence=confidence, cache=cache)
+            _fill_profile(row, qubit, result['t1'], result['t1_ci'], result['t2'], result['t2_ci'],
+                          total_duration, parallel=False)
+        return profiles
+
+    for row, qubit, p1_t1, p0_t2 in zip(profiles, qubits, curves['p1_t1'], curves['p0_t2']):
+        t1, t1_ci = fit_exponential_decay(delays_ns, p1_t1, confidence)
+        t2, t2_ci = fit_exponential_decay(delays_ns, p0_t2, confidence)
+        _fill_profile(row, qubit, t1, t1_ci, t2, t2_ci, total_duration, parallel=True)
+    return profiles
+
+
+def _fill_profile(row, qubit, t1, t1_ci, t2, t2_ci, total_duration, parallel):
+    row['qubit'] = str(qubit)
+    row['t1'], (row['t1_low'], row['t1_high']) = t1, t1_ci
+    row['t2'], (row['t2_low'], row['t2_high']) = t2, t2_ci
+    for key, value in noise_profile_from_times(t1, t2, total_duration).items():
+        row[key] = value
+    row['parallel'] = parallel
+
+
+def characterize_noise(qubit, simulator, repetitions=1000, total_duration=100):
+    """
+    Characterizes the noise profile of a given qubit from its T1 and T2 decays.
+    """
+    profile = characterize_register([qubit], simulator, repetitions=repetitions, total_duration=total_duration)[0]
+    return {key: float(profile[key]) for key in ('low_frequency_noise', 'high_frequency_noise', 'correlated_noise')}
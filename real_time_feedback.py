@@ -1,4 +1,9 @@
+from collections import Counter
+
 import cirq
+import numpy as np
+
+from tracing import POSTPROCESS, SIMULATE, span
 
 def real_time_feedback_control(circuit, measurements, noise_profile, qubit):
     """
@@ -27,3 +32,76 @@ def real_time_feedback_control(circuit, measurements, noise_profile, qubit):
         modified_circuit.append(cirq.measure(qubit, key='result'))
 
     return modified_circuit
+
+
+class IncrementalFeedbackSimulator:
+    """
+    Carries the ensemble density matrix between feedback steps.
+
+    Each call to ``step`` only simulates the newly appended operations, so the
+    cost per step is constant instead of growing with the circuit. Mid-circuit
+    measurements are handled on the ensemble: shot counts are sampled from the
+    measured qubits' marginal distribution and the state is then dephased in the
+    measurement basis, exactly as averaging over all shots would leave it.
+    """
+
+    def __init__(self, qubits, noise=None, seed=None):
+        self.qubits = list(qubits)
+        self.simulator = cirq.DensityMatrixSimulator(noise=noise, dtype=np.complex128)
+        self.rng = np.random.default_rng(seed)
+        dimension = 2 ** len(self.qubits)
+        self.state = np.zeros((dimension, dimension), dtype=np.complex128)
+        self.state[0, 0] = 1
+
+    def _evolve(self, moments):
+        if not moments:
+            return
+        with span('IncrementalFeedbackSimulator.evolve', SIMULATE, moments=len(moments), qubits=len(self.qubits)):
+            result = self.simulator.simulate(
+                cirq.Circuit(moments), qubit_order=self.qubits, initial_state=self.state
+            )
+        self.state = result.final_density_matrix
+
+    def _measure(self, op, repetitions):
+        n = len(self.qubits)
+        axes = [self.qubits.index(q) for q in op.qubits]
+
+        # Marginal distribution of the measured qubits (big-endian outcome index)
+        populations = np.real(np.diagonal(self.state)).reshape((2,) * n)
+        others = tuple(i for i in range(n) if i not in axes)
+        marginal = np.transpose(populations.sum(axis=others, keepdims=True), others + tuple(axes))
+        marginal = np.clip(marginal.reshape(-1), 0, None)
+        counts = self.rng.multinomial(repetitions, marginal / marginal.sum())
+
+        # Non-selective collapse: drop coherences between different outcomes
+        tensor = self.state.reshape((2,) * (2 * n))
+        mask = np.ones(tensor.shape, dtype=bool)
+        for axis in axes:
+            index = np.arange(2)
+            shape = [1] * (2 * n)
+            shape[axis], shape[n + axis] = 2, 2
+            keep = (index[:, None] == index[None, :]).reshape(shape)
+            mask &= keep
+        self.state = np.where(mask, tensor, 0).reshape(self.state.shape)
+
+        with span('Counter', POSTPROCESS, repetitions=repetitions):
+            return Counter({outcome: int(c) for outcome, c in enumerate(counts) if c})
+
+    def step(self, circuit, repetitions=1000):
+        """
+        Apply the new operations and return a histogram per measurement key.
+        """
+        histograms = {}
+        pending = []
+        for moment in cirq.Circuit(circuit):
+            measurements = [op for op in moment if cirq.is_measurement(op)]
+            others = [op for op in moment if not cirq.is_measurement(op)]
+            if others:
+                pending.append(cirq.Moment(others))
+            if measurements:
+                self._evolve(pending)
+                pending = []
+                for op in measurements:
+                    histograms[cirq.measurement_key_name(op)] = self._measure(op, repetitions)
+        self._evolve(pending)
+        return histograms
@@ -0,0 +1,233 @@
+import hashlib
+import os
+import shutil
+import tempfile
+import time
+
+import cirq
+import numpy as np
+
+# Bump when the layout of cached entries changes
+CACHE_FORMAT = 1
+DEFAULT_MAX_BYTES = 1 << 30
+
+INDEX_DTYPE = np.dtype([('key', 'U64'), ('bytes', 'i8'), ('accessed', 'f8')])
+
+
+def default_cache_directory():
+    """
+    Cache location: ``$QUBIT_RESULT_CACHE`` or ``~/.cache/diamond-qubit``.
+    """
+    return os.environ.get('QUBIT_RESULT_CACHE', os.path.join(os.path.expanduser('~'), '.cache', 'diamond-qubit'))
+
+
+def noise_fingerprint(noise):
+    """
+    Stable text identifying a noise model, channel or simulator noise.
+    """
+    if noise is None:
+        return 'none'
+    try:
+        return cirq.to_json(noise)
+    except (TypeError, ValueError):
+        pass
+    if type(noise).__repr__ is not object.__repr__:
+        return repr(noise)
+    # Default reprs contain memory addresses; use the public attributes instead
+    public = {name: value for name, value in vars(noise).items() if not name.startswith('_')}
+    return f'{type(noise).__qualname__}({public!r})'
+
+
+def cache_key(*circuits, **params):
+    """
+    SHA-256 of the serialized circuits, extra parameters and library versions.
+
+    Parameters:
+    - circuits: cirq.Circuit objects that define the computation.
+    - params: Everything else the result depends on (noise, repetitions, seed, ...).
+      Values are serialized with ``repr``, so arrays and floats must be passed
+      as they will be used.
+    """
+    digest = hashlib.sha256()
+    for circuit in circuits:
+        digest.update(cirq.to_json(circuit).encode())
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, np.ndarray):
+            value = value.tolist()
+        digest.update(f'{name}={value!r};'.encode())
+    digest.update(f'cirq={cirq.__version__};numpy={np.__version__};format={CACHE_FORMAT}'.encode())
+    return digest.hexdigest()
+
+
+class ResultCache:
+    """
+    Persistent, content-addressed store of simulation results.
+
+    Each entry is a directory of ``.npy`` files named after its key and is
+    loaded memory-mapped, so a warm hit costs a few file opens rather than a
+    simulation. A hit only touches the entry directory, whose modification
+    time serves as its last access time; an index caches entry sizes. Once
+    the entries on disk exceed ``max_bytes`` the least recently used ones are
+    evicted, including entries missing from the index.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_directory()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self._index_path = os.path.join(self.directory, 'index.npy')
+        self.hits = 0
+        self.misses = 0
+
+    def _entry_path(self, key):
+        return os.path.join(self.directory, key)
+
+    def _read_index(self):
+        try:
+            index = np.load(self._index_path)
+        except (OSError, ValueError):
+            return {}
+        return {str(key): (int(size), float(accessed)) for key, size, accessed in index}
+
+    def _write_index(self, index):
+        entries = np.array([(key, size, accessed) for key, (size, accessed) in index.items()], dtype=INDEX_DTYPE)
+        # Write then rename so readers never see a partial index
+        fd, path = tempfile.mkstemp(dir=self.directory, suffix='.npy')
+        with os.fdopen(fd, 'wb') as handle:
+            np.save(handle, entries)
+        os.replace(path, self._index_path)
+
+    def get(self, key):
+        """
+        Arrays stored under ``key`` as read-only memory maps, or None on a miss.
+        """
+        path = self._entry_path(key)
+        if not os.path.isdir(path):
+            self.misses += 1
+            return None
+        arrays = {
+            name[:-4]: np.load(os.path.join(path, name), mmap_mode='r')
+            for name in os.listdir(path) if name.endswith('.npy')
+        }
+        # Record the access without rewriting the index
+        os.utime(path)
+        self.hits += 1
+        return arrays
+
+    def put(self, key, arrays):
+        """
+        Store a dictionary of name -> array under ``key`` and evict if over budget.
+        """
+        path = self._entry_path(key)
+        staging = tempfile.mkdtemp(dir=self.directory, prefix='.staging-')
+        for name, array in arrays.items():
+            np.save(os.path.join(staging, f'{name}.npy'), np.asarray(array))
+        size = _directory_size(staging)
+        if os.path.isdir(path):
+            shutil.rmtree(staging)
+            os.utime(path)
+        else:
+            os.replace(staging, path)
+
+        index = self._entries()
+        index[key] = (size, time.time())
+        self._evict(index, keep=key)
+        self._write_index(index)
+
+    def _entries(self):
+        """
+        Size and last access time of every entry directory on disk.
+
+        Sizes come from the index where known; directories missing from it
+        are measured, so they can be evicted as well.
+        """
+        sizes = self._read_index()
+        entries = {}
+        for name in os.listdir(self.directory):
+            path = self._entry_path(name)
+            if len(name) != 64 or not os.path.isdir(path):
+                continue
+            try:
+                size = sizes[name][0] if name in sizes else _directory_size(path)
+                entries[name] = (size, os.stat(path).st_mtime)
+            except OSError:
+                continue  # evicted by another process meanwhile
+        return entries
+
+    def _evict(self, index, keep):
+        total = sum(size for size, _ in index.values())
+        for key in sorted(index, key=lambda k: index[k][1]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+            total -= index.pop(key)[0]
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+
+    def size_bytes(self):
+        return sum(size for size, _ in self._entries().values())
+
+    def clear(self):
+        for key in self._entries():
+            shutil.rmtree(self._entry_path(key), ignore_errors=True)
+        self._write_index({})
+
+    def cached(self, key, compute):
+        """
+        Return the arrays stored under ``key``, computing and storing them on a miss.
+
+        ``compute`` is called without arguments and returns a name -> array dict.
+        """
+        arrays = self.get(key)
+        if arrays is None:
+            arrays = compute()
+            self.put(key, arrays)
+        return arrays
+
+
+def _directory_size(path):
+    return sum(os.path.getsize(os.path.join(path, name)) for name in os.listdir(path))
+
+
+def _seeded_like(simulator, seed):
+    # A new simulator with the same type and noise, sampling from ``seed``
+    noise = getattr(simulator, 'noise', None)
+    if noise is None:
+        return type(simulator)(seed=seed)
+    return type(simulator)(noise=noise, seed=seed)
+
+
+def cached_run(simulator, circuit, repetitions, cache=None, seed=None, **params):
+    """
+    ``simulator.run`` through a ``ResultCache``.
+
+    The key covers the circuit, the simulator type and noise, ``repetitions``,
+    ``seed`` and any extra ``params``. With a seed the samples are drawn by a
+    new simulator of the same type and noise, seeded from the key, so they
+    depend only on what the key covers: every call returns the same samples
+    whether or not a cache is given, and entries differing only in ``params``
+    (e.g. a cycle index) get independent samples. Without a seed this is a
+    plain ``simulator.run`` and nothing is cached, since unseeded samples are
+    fresh on every call and must not be replayed.
+
+    Returns:
+    - result: A cirq.Result whose measurements may be memory-mapped.
+    """
+    if seed is None:
+        return simulator.run(circuit, repetitions=repetitions)
+    key = cache_key(
+        circuit,
+        simulator=type(simulator).__qualname__,
+        noise=noise_fingerprint(getattr(simulator, 'noise', None)),
+        repetitions=repetitions,
+        seed=seed,
+        **params,
+    )
+
+    def run():
+        seeded = _seeded_like(simulator, int(key[:8], 16))
+        return dict(seeded.run(circuit, repetitions=repetitions).measurements)
+
+    measurements = run() if cache is None else cache.cached(key, run)
+    return cirq.ResultDict(params=cirq.ParamResolver({}), measurements=measurements)
@@ -1,7 +1,9 @@
 import cirq
+from measurement_store import MeasurementStore
 from qubit_characterization import measure_t1_t2
-from real_time_feedback import real_time_feedback_control
+from real_time_feedback import IncrementalFeedbackSimulator, real_time_feedback_control
 from decoupling_sequences import choose_decoupling_sequence
+from tracing import POSTPROCESS, SIMULATE, measurement_bytes, span
 
 def simulate_without_noise(qubit, simulator, sequence, time_steps=100, repetitions=1000):
     """
@@ -21,7 +23,7 @@ def simulate_without_noise(qubit, simulator, sequence, time_steps=100, repetitio
     measurements = simulator.run(circuit, repetitions=repetitions)
     print("Initial Measurements:", measurements.histogram(key='result'))
 
-    all_measurements = []
+    store = MeasurementStore()
 
     for step in range(time_steps):
         print(f"Time Step {step + 1}/{time_steps}")
@@ -30,17 +32,45 @@ def simulate_without_noise(qubit, simulator, sequence, time_steps=100, repetitio
         circuit = real_time_feedback_control(circuit, measurements.histogram(key='result'), {}, qubit)
 
         # Run the simulation again
-        measurements = simulator.run(circuit, repetitions=repetitions)
+        with span('simulator.run', SIMULATE, repetitions=repetitions, circuit=circuit) as current:
+            measurements = simulator.run(circuit, repetitions=repetitions)
+            current.set(measurement_bytes=lambda: measurement_bytes(measurements.measurements))
 
         # Use histogram to access measurement results
-        step_results = measurements.histogram(key='result')
-        all_measurements.extend([0] * step_results.get(0, 0) + [1] * step_results.get(1, 0))
+        with span('histogram', POSTPROCESS, repetitions=repetitions):
+            step_results = measurements.histogram(key='result')
+            store.append_counts('result', step_results, cycle=step)
 
         print(f"Measurements at Time Step {step + 1}:", step_results)
 
     print("Final Measurements:", measurements.histogram(key='result'))
     
     # Create a result object with all measurements
-    final_result = cirq.ResultDict(params=cirq.ParamResolver({}), measurements={'result': all_measurements})
-    
-    return final_result
+    return store.to_result_dict()
+
+def simulate_with_incremental_feedback(qubit, sequence, time_steps=100, repetitions=1000, noise=None, seed=None):
+    """
+    Runs the real-time feedback loop while carrying the simulator state between steps.
+
+    Unlike ``simulate_without_noise`` the circuit is never re-simulated from the
+    start: every step applies only the feedback operations and the new
+    measurement, so the cost per step stays constant.
+    """
+    runner = IncrementalFeedbackSimulator([qubit], noise=noise, seed=seed)
+
+    # Apply the chosen decoupling sequence and an initial Hadamard gate
+    circuit = cirq.Circuit(sequence)
+    circuit.append(cirq.H(qubit))
+    circuit.append(cirq.measure(qubit, key='result'))
+    histogram = runner.step(circuit, repetitions)['result']
+    print("Initial Measurements:", histogram)
+
+    store = MeasurementStore()
+    for step in range(time_steps):
+        # Feedback on an empty circuit yields just the new operations plus a measurement
+        new_ops = real_time_feedback_control(cirq.Circuit(), histogram, {}, qubit)
+        histogram = runner.step(new_ops, repetitions)['result']
+        store.append_counts('result', histogram, cycle=step)
+
+    print("Final Measurements:", histogram)
+    return store.to_result_dict()
@@ -0,0 +1,243 @@
+import functools
+import itertools
+
+import cirq
+import numpy as np
+
+from fault_tolerant_encoding import FIVE_QUBIT_STABILIZERS, append_flagged_measurement
+from pauli_frame import propagate_pauli
+
+# Logical X and Z of the five-qubit code
+FIVE_QUBIT_LOGICALS = ('XXXXX', 'ZZZZZ')
+
+_PAULI_MASKS = {'I': (0, 0), 'X': (1, 0), 'Y': (1, 1), 'Z': (0, 1)}
+
+
+def pauli_masks(pauli_string):
+    """
+    Convert a Pauli string such as 'XZZXI' into (x, z) bit masks, qubit i at bit i.
+    """
+    x_mask = z_mask = 0
+    for i, label in enumerate(pauli_string):
+        x_bit, z_bit = _PAULI_MASKS[label]
+        x_mask |= x_bit << i
+        z_mask |= z_bit << i
+    return x_mask, z_mask
+
+
+def syndrome_of(x_mask, z_mask, stabilizers):
+    """
+    Syndrome integer of a Pauli error; stabilizer 0 is the most significant bit.
+    """
+    syndrome = 0
+    for stabilizer in stabilizers:
+        s_x, s_z = pauli_masks(stabilizer)
+        anticommutes = (bin(x_mask & s_z).count('1') + bin(z_mask & s_x).count('1')) % 2
+        syndrome = (syndrome << 1) | anticommutes
+    return syndrome
+
+
+@functools.lru_cache(maxsize=None)
+def single_fault_errors(stabilizer):
+    """
+    Data errors left by every single fault in one flagged stabilizer measurement.
+
+    The measurement is built with ``append_flagged_measurement`` and each
+    one- or two-qubit Pauli fault after each of its operations is propagated
+    to the end with ``propagate_pauli``.
+
+    Returns:
+    - errors: Tuple of (x_mask, z_mask, flagged) triples, one per fault.
+    """
+    data_qubits = [cirq.NamedQubit(f'q{i}') for i in range(len(stabilizer))]
+    circuit = cirq.Circuit()
+    append_flagged_measurement(circuit, stabilizer, data_qubits, cirq.NamedQubit('aux'),
+                               cirq.NamedQubit('flag'), 'fault')
+    operations = list(circuit.all_operations())
+
+    errors = []
+    for index, op in enumerate(operations):
+        if cirq.is_measurement(op):
+            continue
+        for labels in itertools.product('IXYZ', repeat=len(op.qubits)):
+            if set(labels) == {'I'}:
+                continue
+            flips, frame = propagate_pauli(operations[index + 1:], dict(zip(op.qubits, labels)))
+            bits = [frame.get(qubit, (0, 0)) for qubit in data_qubits]
+            x_mask = sum(x_bit << i for i, (x_bit, _) in enumerate(bits))
+            z_mask = sum(z_bit << i for i, (_, z_bit) in enumerate(bits))
+            errors.append((x_mask, z_mask, flips.get('flag_fault', (0,))[0]))
+    return tuple(errors)
+
+
+def hook_errors(stabilizer):
+    """
+    Distinct data errors left by single faults that trip the stabilizer's flag.
+    """
+    return sorted({(x_mask, z_mask) for x_mask, z_mask, flagged in single_fault_errors(stabilizer) if flagged})
+
+
+def _weight(x_mask, z_mask):
+    return bin(x_mask | z_mask).count('1')
+
+
+@functools.lru_cache(maxsize=None)
+def lookup_tables(stabilizers=tuple(FIVE_QUBIT_STABILIZERS), logicals=FIVE_QUBIT_LOGICALS):
+    """
+    Build the syndrome-to-correction and flag-to-correction tables once.
+
+    Every table entry is checked against the errors single faults actually
+    leave (see ``single_fault_errors``): an error and its correction must
+    differ by a stabilizer, i.e. commute with ``logicals``.
+
+    Returns:
+    - x_table, z_table: Arrays of shape (num_stabilizers + 1, 2**num_stabilizers).
+      Row 0 is used when no flag fired and maps each syndrome to a single-qubit
+      correction; row i + 1 is used when stabilizer i was flagged and maps the
+      syndromes of its hook errors to the lowest-weight hook.
+    """
+    num_qubits = len(stabilizers[0])
+    num_syndromes = 2 ** len(stabilizers)
+
+    unflagged = {0: (0, 0)}
+    for qubit in range(num_qubits):
+        for label in 'XYZ':
+            x_mask, z_mask = pauli_masks('I' * qubit + label + 'I' * (num_qubits - qubit - 1))
+            unflagged.setdefault(syndrome_of(x_mask, z_mask, stabilizers), (x_mask, z_mask))
+
+    x_table = np.zeros((len(stabilizers) + 1, num_syndromes), dtype=np.int64)
+    z_table = np.zeros_like(x_table)
+    for row in range(len(stabilizers) + 1):
+        table = dict(unflagged)
+        if row == 0:
+            expected = {(x, z) for stabilizer in stabilizers
+                        for x, z, flagged in single_fault_errors(stabilizer) if not flagged}
+        else:
+            expected = set(hook_errors(stabilizers[row - 1]))
+            # Lowest-weight hook per syndrome replaces the single-qubit guess
+            for x_mask, z_mask in sorted(expected, key=lambda error: -_weight(*error)):
+                table[syndrome_of(x_mask, z_mask, stabilizers)] = (x_mask, z_mask)
+
+        for x_mask, z_mask in expected:
+            x_fix, z_fix = table[syndrome_of(x_mask, z_mask, stabilizers)]
+            if syndrome_of(x_mask ^ x_fix, z_mask ^ z_fix, logicals):
+                raise ValueError(f"Single faults in the flagged measurement of stabilizer row {row} "
+                                 "leave errors that no lookup table can tell apart.")
+        for syndrome, (x_mask, z_mask) in table.items():
+            x_table[row, syndrome] = x_mask
+            z_table[row, syndrome] = z_mask
+
+    for table in (x_table, z_table):
+        table.setflags(write=False)
+    return x_table, z_table
+
+
+@functools.lru_cache(maxsize=None)
+def _parity_table(num_bits):
+    values = np.arange(2 ** num_bits)
+    parity = np.zeros_like(values)
+    for bit in range(num_bits):
+        parity ^= (values >> bit) & 1
+    return parity
+
+
+def pack_bits(measurements, keys):
+    """
+    Pack one bit per key into integers per shot, first key most significant.
+    """
+    packed = np.zeros(len(measurements[keys[0]]), dtype=np.int64)
+    for key in keys:
+        packed = (packed << 1) | measurements[key][:, 0]
+    return packed
+
+
+def syndrome_integers(measurements, round_index, num_stabilizers=4):
+    """
+    Packed syndrome of one stabilizer round for every shot.
+    """
+    return pack_bits(measurements, [f'syndrome_{round_index}_{i}' for i in range(num_stabilizers)])
+
+
+def flag_states(measurements, round_index, num_stabilizers=4):
+    """
+    Row index into the lookup tables for one round: 0 if no flag fired, else
+    1 + first flagged stabilizer.
+    """
+    flags = np.stack([measurements[f'flag_{round_index}_{i}'][:, 0] for i in range(num_stabilizers)], axis=1)
+    return np.where(flags.any(axis=1), flags.argmax(axis=1) + 1, 0)
+
+
+def decode_batch(syndromes, flags, stabilizers=tuple(FIVE_QUBIT_STABILIZERS)):
+    """
+    Look up corrections for whole arrays of syndromes and flag states at once.
+
+    Returns:
+    - x_corrections, z_corrections: Correction masks per shot.
+    """
+    x_table, z_table = lookup_tables(stabilizers)
+    return x_table[flags, syndromes], z_table[flags, syndromes]
+
+
+def decode_rounds(measurements, rounds, num_stabilizers=4):
+    """
+    Decode the syndrome history of ``fault_tolerant_encoding_with_flag``.
+
+    Rounds are processed in order, one NumPy pass over all shots each. The
+    expected syndrome starts at the codeword's all-zero signs. A round whose
+    syndrome differs from it, or in which a flag fired, is decoded with the
+    syndrome of the following round, which a single fault cannot have
+    corrupted as well; the last noisy round is followed by the clean round.
+    Whatever change the clean round still shows is decoded as a data error.
+
+    Returns:
+    - x_corrections, z_corrections: Accumulated correction masks per shot.
+    """
+    syndromes = [syndrome_integers(measurements, r, num_stabilizers) for r in range(rounds + 1)]
+    expected = np.zeros_like(syndromes[0])
+    x_corrections = np.zeros_like(expected)
+    z_corrections = np.zeros_like(expected)
+
+    for round_index in range(rounds + 1):
+        if round_index < rounds:
+            flags = flag_states(measurements, round_index, num_stabilizers)
+            triggered = (flags > 0) | (syndromes[round_index] != expected)
+            change = np.where(triggered, syndromes[round_index + 1] ^ expected, 0)
+        else:
+            flags = np.zeros_like(expected)
+            change = syndromes[round_index] ^ expected
+        x_errors, z_errors = decode_batch(change, flags)
+        x_corrections ^= x_errors
+        z_corrections ^= z_errors
+        # The tables only return errors with the looked-up syndrome
+        expected ^= change
+
+    return x_corrections, z_corrections
+
+
+def logical_error_rate(measurements, rounds, num_qubits=5):
+    """
+    Decode a memory experiment and report logical error rates.
+
+    Expects results from ``fault_tolerant_encoding_with_flag(rounds, measure_logical_x=True)``.
+    The syndrome history is decoded with ``decode_rounds`` and the logical X
+    readout is corrected by the Z part of the accumulated correction.
+
+    Returns:
+    - rates: Dictionary with 'logical_error_rate', 'raw_error_rate' and 'flag_rate'.
+    """
+    if rounds < 1:
+        raise ValueError("At least one stabilizer round is needed to decode.")
+
+    _, z_corrections = decode_rounds(measurements, rounds)
+    flagged = np.any([flag_states(measurements, r) > 0 for r in range(rounds)], axis=0)
+
+    readout = pack_bits(measurements, [f'result_q{i}' for i in range(num_qubits)])
+    parity = _parity_table(num_qubits)
+    raw_errors = parity[readout]
+    logical_errors = raw_errors ^ parity[z_corrections]
+
+    return {
+        'logical_error_rate': float(logical_errors.mean()),
+        'raw_error_rate': float(raw_errors.mean()),
+        'flag_rate': float(flagged.mean()),
+    }
@@ -0,0 +1,64 @@
+import itertools
+
+import cirq
+import numpy as np
+import pytest
+
+from fault_tolerant_encoding import encode_logical_plus, fault_tolerant_encoding_with_flag, flagged_stabilizer_round
+from pauli_frame import propagate_pauli
+from syndrome_decoder import logical_error_rate
+
+
+def _memory_experiment(rounds):
+    """
+    Operations of ``fault_tolerant_encoding_with_flag(rounds, True)`` split into
+    the noiseless prefix, the noisy flagged rounds and the noiseless suffix.
+    """
+    data_qubits = [cirq.NamedQubit(f'q{i}') for i in range(5)]
+    auxiliary_qubit, flag_qubit = cirq.NamedQubit('aux'), cirq.NamedQubit('flag')
+    prefix = list(encode_logical_plus(data_qubits).all_operations())
+    noisy = [op for r in range(rounds)
+             for op in flagged_stabilizer_round(r, data_qubits, auxiliary_qubit, flag_qubit).all_operations()]
+    suffix = list(flagged_stabilizer_round(rounds, data_qubits, auxiliary_qubit, flag_qubit).all_operations())
+    suffix += [cirq.H(q) for q in data_qubits] + [cirq.measure(q, key=f'result_{q}') for q in data_qubits]
+    return data_qubits, prefix, noisy, suffix
+
+
+def _single_faults(data_qubits, noisy):
+    # Data errors entering the first round, then every Pauli after every operation
+    for qubit in data_qubits:
+        for label in 'XYZ':
+            yield 0, {qubit: label}
+    for index, op in enumerate(noisy):
+        if cirq.is_measurement(op):
+            continue
+        for labels in itertools.product('IXYZ', repeat=len(op.qubits)):
+            if set(labels) != {'I'}:
+                yield index + 1, dict(zip(op.qubits, labels))
+
+
+@pytest.mark.parametrize('rounds', [1, 2, 3])
+def test_noiseless_reference_is_deterministic(rounds):
+    circuit = fault_tolerant_encoding_with_flag(rounds, measure_logical_x=True)
+    measurements = cirq.CliffordSimulator(seed=0).run(circuit, repetitions=20).measurements
+
+    for key, bits in measurements.items():
+        if not key.startswith('result_'):
+            assert not bits.any(), key
+    assert logical_error_rate(measurements, rounds)['logical_error_rate'] == 0
+
+
+@pytest.mark.parametrize('rounds', [1, 2, 3])
+def test_every_single_fault_is_corrected(rounds):
+    data_qubits, prefix, noisy, suffix = _memory_experiment(rounds)
+    keys = [cirq.measurement_key_name(op) for op in noisy + suffix if cirq.is_measurement(op)]
+
+    failures = []
+    for start, fault in _single_faults(data_qubits, noisy):
+        flips, _ = propagate_pauli(noisy[start:] + suffix, fault)
+        # The noiseless reference reads all zeros with even readout parity
+        measurements = {key: np.array([flips.get(key, (0,))], dtype=np.int64) for key in keys}
+        if logical_error_rate(measurements, rounds)['logical_error_rate']:
+            failures.append((start, fault))
+
+    assert not failures, f"{len(failures)} uncorrected single faults, e.g. {failures[:3]}"
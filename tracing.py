@@ -0,0 +1,264 @@
+import cProfile
+import functools
+import io
+import json
+import pstats
+import threading
+import time
+
+import cirq
+import numpy as np
+
+# Pipeline stages used by the instrumented code
+BUILD = 'build'
+NOISE = 'noise'
+SIMULATE = 'simulate'
+POSTPROCESS = 'postprocess'
+
+_tracer = None
+
+
+class _NullSpan:
+    """Shared no-op span returned while tracing is disabled."""
+
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set(self, **metrics):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Span:
+    """
+    One timed region; metrics can be attached while it is open with ``set``.
+    """
+
+    __slots__ = ('tracer', 'name', 'stage', 'metrics', 'start_ns', 'duration_ns', 'thread')
+
+    def __init__(self, tracer, name, stage, metrics):
+        self.tracer = tracer
+        self.name = name
+        self.stage = stage
+        self.metrics = metrics
+        self.start_ns = 0
+        self.duration_ns = 0
+        self.thread = threading.get_ident()
+
+    def __enter__(self):
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.duration_ns = time.perf_counter_ns() - self.start_ns
+        self.tracer.spans.append(self)
+        return False
+
+    def set(self, **metrics):
+        self.metrics.update((key, value() if callable(value) else value) for key, value in metrics.items())
+
+
+class Tracer:
+    """
+    Collects spans and turns them into a Chrome trace or a per-stage summary.
+    """
+
+    def __init__(self):
+        self.spans = []
+        self.origin_ns = time.perf_counter_ns()
+
+    def chrome_trace(self):
+        """
+        Spans as a Chrome trace event dictionary (load it in chrome://tracing or Perfetto).
+        """
+        events = [
+            {
+                'name': span.name,
+                'cat': span.stage,
+                'ph': 'X',
+                'ts': (span.start_ns - self.origin_ns) / 1e3,
+                'dur': span.duration_ns / 1e3,
+                'pid': 0,
+                'tid': span.thread,
+                'args': {key: _json_value(value) for key, value in span.metrics.items()},
+            }
+            for span in self.spans
+        ]
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def export_chrome_trace(self, path):
+        with open(path, 'w') as handle:
+            json.dump(self.chrome_trace(), handle)
+
+    def summary(self):
+        """
+        Per-stage totals. Time is inclusive, so nested spans of different stages
+        are counted in both.
+
+        Returns:
+        - rows: List of dictionaries with 'stage', 'spans', 'total_s', 'mean_s',
+          'max_s' and the summed numeric metrics, sorted by total time.
+        """
+        rows = {}
+        for span in self.spans:
+            row = rows.setdefault(span.stage, {'stage': span.stage, 'spans': 0, 'total_s': 0.0, 'max_s': 0.0})
+            seconds = span.duration_ns / 1e9
+            row['spans'] += 1
+            row['total_s'] += seconds
+            row['max_s'] = max(row['max_s'], seconds)
+            for key, value in span.metrics.items():
+                if isinstance(value, (int, float, np.integer, np.floating)) and not isinstance(value, bool):
+                    row[key] = row.get(key, 0) + value
+        for row in rows.values():
+            row['mean_s'] = row['total_s'] / row['spans']
+        return sorted(rows.values(), key=lambda row: row['total_s'], reverse=True)
+
+    def print_summary(self):
+        metric_names = ('operations', 'moments', 'qubits', 'repetitions', 'measurement_bytes')
+        print(f"{'stage':<12} {'spans':>7} {'total (ms)':>11} {'mean (ms)':>10} {'max (ms)':>9} "
+              + ' '.join(f'{name:>17}' for name in metric_names))
+        for row in self.summary():
+            print(f"{row['stage']:<12} {row['spans']:>7} {row['total_s'] * 1e3:>11.2f} "
+                  f"{row['mean_s'] * 1e3:>10.3f} {row['max_s'] * 1e3:>9.3f} "
+                  + ' '.join(f'{row.get(name, 0):>17}' for name in metric_names))
+
+
+def _json_value(value):
+    if isinstance(value, (np.integer, np.floating)):
+        return value.item()
+    if isinstance(value, (int, float, str, bool)) or value is None:
+        return value
+    return repr(value)
+
+
+def enabled():
+    return _tracer is not None
+
+
+def enable():
+    """
+    Start collecting spans in a fresh ``Tracer`` and return it.
+    """
+    global _tracer
+    _tracer = Tracer()
+    return _tracer
+
+
+def disable():
+    """
+    Stop collecting spans and return the tracer that was active, if any.
+    """
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+
+class tracing:
+    """
+    Context manager that enables tracing for a block and yields the tracer.
+    """
+
+    def __enter__(self):
+        self._previous = _tracer
+        return enable()
+
+    def __exit__(self, *exc_info):
+        global _tracer
+        _tracer = self._previous
+        return False
+
+
+def span(name, stage, circuit=None, **metrics):
+    """
+    Time a block as one span of ``stage``; a shared no-op while tracing is off.
+
+    The size metrics of ``circuit`` are added only while tracing is on, and
+    metric values passed to ``set`` may be zero-argument callables so that
+    costly metrics are never computed for the no-op span.
+    """
+    if _tracer is None:
+        return _NULL_SPAN
+    if circuit is not None:
+        metrics.update(circuit_metrics(circuit))
+    return Span(_tracer, name, stage, metrics)
+
+
+def traced(stage):
+    """
+    Decorator recording each call as a span; circuits returned by the function
+    add their size metrics. Costs one global lookup per call when disabled.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with Span(_tracer, func.__qualname__, stage, {}) as current:
+                result = func(*args, **kwargs)
+                if isinstance(result, cirq.AbstractCircuit):
+                    current.set(**circuit_metrics(result))
+                return result
+        return wrapper
+    return decorator
+
+
+def circuit_metrics(circuit):
+    """
+    Operation, moment and qubit counts of a circuit.
+    """
+    return {
+        'operations': sum(len(moment) for moment in circuit),
+        'moments': len(circuit),
+        'qubits': len(circuit.all_qubits()),
+    }
+
+
+def measurement_bytes(measurements):
+    """
+    Bytes held by a ``{key: array}`` measurement dictionary.
+    """
+    return int(sum(np.asarray(bits).nbytes for bits in measurements.values()))
+
+
+class profile:
+    """
+    Capture a ``cProfile`` profile around one named experiment.
+
+    The block is also recorded as a span when tracing is on. After the block,
+    ``stats`` holds the ``pstats.Stats``; with ``path`` the raw profile is
+    dumped there for snakeviz or ``python -m pstats``.
+    """
+
+    def __init__(self, name, path=None, print_top=0, sort='cumulative'):
+        self.name = name
+        self.path = path
+        self.print_top = print_top
+        self.sort = sort
+        self.stats = None
+        self._profiler = cProfile.Profile()
+        self._span = None
+
+    def __enter__(self):
+        self._span = span(self.name, 'experiment')
+        self._span.__enter__()
+        self._profiler.enable()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._profiler.disable()
+        self._span.__exit__(*exc_info)
+        if self.path:
+            self._profiler.dump_stats(self.path)
+        output = io.StringIO()
+        self.stats = pstats.Stats(self._profiler, stream=output).sort_stats(self.sort)
+        if self.print_top:
+            self.stats.print_stats(self.print_top)
+            print(f"Profile of {self.name}:\n{output.getvalue()}")
+        return False